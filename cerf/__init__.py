@@ -1,7 +1,7 @@
 from .package_data import *
 from .model import *
 from .outputs import *
-from .process import run
+from .process import run, run_pathway, validate_precision
 from .interconnect import *
 from .lmp import *
 from .utils import *
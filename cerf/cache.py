@@ -0,0 +1,218 @@
+"""Persistent cache for staged CERF data.
+
+@author Chris R. vernon
+@email chris.vernon@pnnl.gov
+
+License:  BSD 2-Clause, see LICENSE and DISCLAIMER files
+
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+import numpy as np
+
+
+# content hashes of input files keyed by (path, size, modification time)
+_FILE_HASHES = {}
+
+
+def file_hash(file_path, chunk_size=2 ** 20):
+    """Generate the SHA-256 hash of the content of a file.  Hashes are memoized for the life of the process and are
+    regenerated if the size or modification time of the file changes.
+
+    :param file_path:                   Full path with file name and extension to the file
+    :type file_path:                    str
+
+    :param chunk_size:                  Number of bytes to read at a time
+    :type chunk_size:                   int
+
+    :return:                            Hex digest of the file content
+
+    """
+
+    file_path = os.path.abspath(file_path)
+    stat = os.stat(file_path)
+    memo_key = (file_path, stat.st_size, stat.st_mtime_ns)
+
+    if memo_key not in _FILE_HASHES:
+
+        digest = hashlib.sha256()
+
+        with open(file_path, 'rb') as src:
+            for chunk in iter(lambda: src.read(chunk_size), b''):
+                digest.update(chunk)
+
+        _FILE_HASHES[memo_key] = digest.hexdigest()
+
+    return _FILE_HASHES[memo_key]
+
+
+def dataset_files(file_path):
+    """Get all files of a multi-file dataset such as a shapefile, which share the base name of `file_path`, so that
+    edits to any component are reflected in the cache key.
+
+    :param file_path:                   Full path with file name and extension to the main file of the dataset.  If
+                                        None, None is returned.
+    :type file_path:                    str
+
+    :return:                            Sorted list of full paths to the files of the dataset
+
+    """
+
+    if file_path is None:
+        return None
+
+    base_name = os.path.splitext(os.path.basename(file_path))[0]
+    directory = os.path.dirname(os.path.abspath(file_path))
+
+    return sorted(os.path.join(directory, i) for i in os.listdir(directory) if os.path.splitext(i)[0] == base_name)
+
+
+def _normalize(value):
+    """Convert an input into a JSON serializable form where paths to existing files are replaced by the hash of
+    their content so that renaming or moving a file does not invalidate the cache but editing it does.
+
+    """
+
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+
+    elif isinstance(value, (list, tuple)):
+        return [_normalize(i) for i in value]
+
+    elif isinstance(value, str) and os.path.isfile(value):
+        return {'file_sha256': file_hash(value)}
+
+    elif isinstance(value, np.generic):
+        return value.item()
+
+    elif isinstance(value, np.ndarray):
+        return {'array_sha256': hashlib.sha256(np.ascontiguousarray(value).tobytes()).hexdigest(),
+                'shape': list(value.shape),
+                'dtype': str(value.dtype)}
+
+    else:
+        return value
+
+
+def cache_key(*inputs):
+    """Generate a key from the inputs that determine a staged product.  Any string that is a path to an existing file
+    is keyed by the content of the file.  The installed CERF version is always included so that a new release does not
+    reuse products built by an older one.
+
+    :param inputs:                      Any number of JSON serializable inputs, dictionaries, lists, or arrays
+
+    :return:                            Hex digest key
+
+    """
+
+    from cerf import __version__
+
+    payload = json.dumps([__version__, _normalize(inputs)], sort_keys=True, default=str)
+
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class StagingCache:
+    """Store staged arrays as NPY files in a directory keyed by the hash of the inputs they were built from so that
+    repeated runs with the same inputs skip recomputing them.
+
+    :param directory:                   Full path to the directory to store cached arrays in.  Created if it does not
+                                        exist.
+    :type directory:                    str
+
+    """
+
+    def __init__(self, directory):
+
+        self.directory = directory
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    def product_file(self, name, key, compressed=False):
+        """Full path with file name and extension to the NPY, or compressed NPZ, file for a staged product."""
+
+        extension = 'npz' if compressed else 'npy'
+
+        return os.path.join(self.directory, f"{name}_{key}.{extension}")
+
+    def load(self, name, key, compressed=False):
+        """Load an array from the cache."""
+
+        if compressed:
+            with np.load(self.product_file(name, key, compressed)) as src:
+                return src['arr']
+
+        return np.load(self.product_file(name, key))
+
+    def save(self, name, key, arr, compressed=False):
+        """Write an array to the cache.  The array is written to a temporary file first and then renamed so that
+        concurrent runs sharing the cache never read a partially written file.
+
+        """
+
+        fd, tmp_file = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+
+        try:
+            with os.fdopen(fd, 'wb') as dest:
+                if compressed:
+                    np.savez_compressed(dest, arr=arr)
+                else:
+                    np.save(dest, arr)
+
+            os.replace(tmp_file, self.product_file(name, key, compressed))
+
+        except BaseException:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+            raise
+
+    def get_or_compute(self, names, key, func, compressed=False):
+        """Load staged products from the cache or compute and cache them if any are missing.
+
+        :param names:                   Name of the staged product or a tuple of names if `func` returns a tuple of
+                                        arrays
+        :type names:                    str, tuple
+
+        :param key:                     Key generated from the inputs of the staged product using `cache_key`
+        :type key:                      str
+
+        :param func:                    Function with no arguments that computes the staged product(s)
+        :type func:                     function
+
+        :param compressed:              If True, store products as compressed NPZ files.  Suited to sparse or smooth
+                                        fields that compress well.
+        :type compressed:               bool
+
+        :return:                        Array or tuple of arrays ordered as `names`
+
+        """
+
+        single = isinstance(names, str)
+
+        if single:
+            names = (names,)
+
+        product_files = [self.product_file(name, key, compressed) for name in names]
+
+        if all(os.path.isfile(i) for i in product_files):
+            logging.info(f"Loading {', '.join(names)} from the staging cache:  {self.directory}")
+            result = tuple(self.load(name, key, compressed) for name in names)
+
+        else:
+            result = func()
+
+            if single:
+                result = (result,)
+
+            for name, arr in zip(names, result):
+                self.save(name, key, arr, compressed)
+
+        if single:
+            return result[0]
+
+        return result
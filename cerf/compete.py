@@ -6,6 +6,202 @@ import pandas as pd
 import cerf.utils as util
 
 
+def penalty_array(nlc_arr):
+    """Convert Net Locational Costs to a plain floating point array where grid cells excluded from siting are +inf.
+    Masked arrays are accepted for compatibility and their masked elements become +inf.
+
+    :param nlc_arr:                                 Array or masked array of Net Locational Costs
+    :type nlc_arr:                                  ndarray
+
+    :return:                                        Floating point array with excluded grid cells as +inf
+
+    """
+
+    if not np.issubdtype(nlc_arr.dtype, np.floating):
+        nlc_arr = nlc_arr.astype(np.float64)
+
+    if np.ma.isMaskedArray(nlc_arr):
+        return np.ma.filled(nlc_arr, np.inf)
+
+    return np.asarray(nlc_arr)
+
+
+class CheapestTracker:
+    """Track the cheapest technology per grid cell as technologies are retired from competition.
+
+    The full argmin over the NLC cube is only calculated once.  For each grid cell the winning technology and its NLC
+    are stored along with the runner-up.  When a technology is retired, the cells it was winning fall back to their
+    runner-up and only the cells whose runner-up has gone stale are re-evaluated.  Grid cells set to 0 in `best` are
+    treated as excluded from siting and are never re-evaluated.
+
+    :param nlc_arr:                                 3D array of [tech_id, x, y] for Net Locational Costs where the 0
+                                                    index position is the default dimension and grid cells excluded
+                                                    from siting are +inf.  Masked arrays are also accepted.
+    :type nlc_arr:                                  ndarray
+
+    :param active:                                  Boolean array having a value per dimension in `nlc_arr` where
+                                                    True designates a technology that is able to compete
+    :type active:                                   ndarray
+
+    """
+
+    def __init__(self, nlc_arr, active):
+
+        # net locational costs as [tech_index, grid_cell]
+        self.nlc_flat = penalty_array(nlc_arr).reshape((nlc_arr.shape[0], -1))
+
+        # technologies that are still competing; the default dimension never competes
+        self.active = np.array(active, dtype=bool)
+        self.active[0] = False
+
+        # technologies that are not competing can never be the cheapest option
+        nlc_values = self.nlc_flat.copy()
+        nlc_values[~self.active, :] = np.inf
+
+        cell_indices = np.arange(nlc_values.shape[1])
+
+        # cheapest option per grid cell; the default dimension wins where no technology can compete
+        self.best = np.argmin(nlc_values, axis=0)
+        self.best_nlc = nlc_values[self.best, cell_indices]
+
+        # runner-up per grid cell
+        nlc_values[self.best, cell_indices] = np.inf
+        self.second = np.argmin(nlc_values, axis=0)
+        self.second_nlc = nlc_values[self.second, cell_indices]
+
+    def retire(self, tech_index):
+        """Remove a technology from competition and update only the grid cells affected by its removal.
+
+        :param tech_index:                          Index of the technology in the NLC array
+        :type tech_index:                           int
+
+        """
+
+        self.active[tech_index] = False
+
+        # grid cells won by the retired technology are now won by their runner-up
+        won = np.flatnonzero(self.best == tech_index)
+        self.best[won] = self.second[won]
+        self.best_nlc[won] = self.second_nlc[won]
+
+        # the runner-up is stale where it was just promoted or where it was the retired technology
+        stale = np.union1d(won, np.flatnonzero(self.second == tech_index))
+        stale = stale[self.best[stale] > 0]
+
+        self.refresh_second(stale)
+
+    def refresh_second(self, cells):
+        """Recalculate the runner-up technology for the target grid cells.
+
+        :param cells:                               Flat indices of the grid cells to evaluate
+        :type cells:                                ndarray
+
+        """
+
+        if cells.shape[0] == 0:
+            return
+
+        nlc_values = self.nlc_flat[:, cells]
+        nlc_values[~self.active, :] = np.inf
+
+        cell_positions = np.arange(cells.shape[0])
+
+        # exclude the current winner
+        nlc_values[self.best[cells], cell_positions] = np.inf
+
+        second = np.argmin(nlc_values, axis=0)
+        self.second[cells] = second
+        self.second_nlc[cells] = nlc_values[second, cell_positions]
+
+    def exclude(self, cells):
+        """Exclude grid cells from siting for all technologies.
+
+        :param cells:                               Flat indices of the grid cells to exclude
+        :type cells:                                ndarray
+
+        """
+
+        self.best[cells] = 0
+        self.best_nlc[cells] = np.inf
+        self.second[cells] = 0
+        self.second_nlc[cells] = np.inf
+
+    @property
+    def n_available(self):
+        """Number of grid cells that have a technology able to compete for them."""
+
+        return np.count_nonzero(self.best)
+
+
+class SiteRecords:
+    """Columnar store of sited power plants holding only the grid cell index and technology of each site.  Arrays are
+    preallocated and grow geometrically if more sites are added than expected.
+
+    :param expected_sites:                          Number of sites expected to be recorded
+    :type expected_sites:                           int
+
+    """
+
+    def __init__(self, expected_sites=0):
+
+        # number of sites recorded
+        self.n_sites = 0
+
+        capacity = max(int(expected_sites), 1)
+
+        # flat grid cell index of each site
+        self.site_index = np.empty(capacity, dtype=np.int64)
+
+        # index of the technology of each site as it appears in the NLC array
+        self.tech_index = np.empty(capacity, dtype=np.int64)
+
+    def append(self, site_index, tech_index):
+        """Record a sited power plant.
+
+        :param site_index:                          Flat grid cell index of the site
+        :type site_index:                           int
+
+        :param tech_index:                          Index of the technology in the NLC array
+        :type tech_index:                           int
+
+        """
+
+        if self.n_sites == self.site_index.shape[0]:
+            self.site_index = np.resize(self.site_index, 2 * self.n_sites)
+            self.tech_index = np.resize(self.tech_index, 2 * self.n_sites)
+
+        self.site_index[self.n_sites] = site_index
+        self.tech_index[self.n_sites] = tech_index
+        self.n_sites += 1
+
+    def extend(self, site_index, tech_index):
+        """Record several sited power plants of the same technology in the order they were sited.
+
+        :param site_index:                          1D array of flat grid cell indices of the sites
+        :type site_index:                           ndarray
+
+        :param tech_index:                          Index of the technology in the NLC array
+        :type tech_index:                           int
+
+        """
+
+        n_new = site_index.shape[0]
+
+        if self.n_sites + n_new > self.site_index.shape[0]:
+            capacity = max(2 * self.site_index.shape[0], self.n_sites + n_new)
+            self.site_index = np.resize(self.site_index, capacity)
+            self.tech_index = np.resize(self.tech_index, capacity)
+
+        self.site_index[self.n_sites:self.n_sites + n_new] = site_index
+        self.tech_index[self.n_sites:self.n_sites + n_new] = tech_index
+        self.n_sites += n_new
+
+    def sites(self):
+        """Return the recorded flat grid cell indices and technology indices in the order they were sited."""
+
+        return self.site_index[:self.n_sites], self.tech_index[:self.n_sites]
+
+
 class Competition:
     """Technology competition algorithm for CERF.
 
@@ -22,9 +218,10 @@ class Competition:
     :param expansion_plan:                          Dictionary of {tech_id: number_of_sites, ...}
     :type expansion_plan:                           dict
 
-    :param nlc_mask:                                3D masked array of [tech_id, x, y] for Net Locational Costs. Each
-                                                    technology has been masked with its suitability data, so only
-                                                    grid cells that are suitable have an NLC per tech. The 0 index
+    :param nlc_mask:                                3D array of [tech_id, x, y] for Net Locational Costs. Grid cells
+                                                    that are unsuitable for a technology are +inf, so only grid cells
+                                                    that are suitable have an NLC per tech. A masked array where
+                                                    unsuitable grid cells are masked is also accepted. The 0 index
                                                     position is a default dimension which is chosen if no technologies
                                                     are able to compete.
     :type nlc_mask:                                 ndarray
@@ -45,6 +242,27 @@ class Competition:
     :param verbose:                                 Log out siting information. Default False.
     :type verbose:                                  bool
 
+    :param cell_size:                               The (width, height) of a grid cell in meters used to convert each
+                                                    technology's buffer into grid cells.  Default is 1 km grid cells.
+    :type cell_size:                                tuple
+
+    :param coordinates:                             Coordinates of grid cells by grid index from
+                                                    cerf.grid.GridCoordinates.  If provided, the coordinates of sites
+                                                    are computed from their grid index in `indices_flat` and
+                                                    `xcoords` and `ycoords` may be None.
+    :type coordinates:                              class
+
+    :param grid_index:                              Index of the bounding box of the target region from
+                                                    cerf.grid.GridIndex.  If provided, the grid index of sites is
+                                                    computed from their position in the region and `indices_flat`
+                                                    may be None.
+    :type grid_index:                               class
+
+    If the 'batch_placement' setting is True, each technology places every run of NLC ordered winners whose buffers
+    do not overlap in a single step instead of one site per iteration.  Grid cells having the same NLC are then sited
+    in grid index order rather than randomly, which gives the same outcome as one site per iteration where ties are
+    resolved by the lowest grid index.
+
     """
 
     def __init__(self,
@@ -65,7 +283,10 @@ class Competition:
                  indices_flat,
                  randomize=True,
                  seed_value=0,
-                 verbose=False):
+                 verbose=False,
+                 cell_size=(1000.0, 1000.0),
+                 coordinates=None,
+                 grid_index=None):
 
         # target region
         self.target_region_name = target_region_name
@@ -100,11 +321,12 @@ class Competition:
         # lmp zones array
         self.zones_flat_arr = zones_arr
 
-        # flat array of full grid indices value for the target region
+        # flat array of full grid indices value for the target region or their arithmetic conversion
         self.indices_flat = indices_flat
+        self.grid_index = grid_index
 
-        # net locational costs with suitability mask for the target region
-        self.nlc_mask = nlc_mask
+        # net locational costs for the target region where unsuitable grid cells are +inf
+        self.nlc_mask = penalty_array(nlc_mask)
         self.nlc_mask_shape = self.nlc_mask.shape
 
         # log out additional info
@@ -117,33 +339,44 @@ class Competition:
         # number of technologies
         self.n_techs = len(self.technology_order)
 
-        # dictionary to hold sited information
-        self.sited_dict = util.empty_sited_dict()
+        # store of sited grid cells and technologies
+        self.records = SiteRecords(sum([expansion_dict[i]['n_sites'] for i in self.technology_order]))
 
         # coordinates for each index
         self.xcoords = xcoords
         self.ycoords = ycoords
+        self.coordinates = coordinates
+
+        # cached buffer stencil per technology; the shape of the buffer can be 'square' or 'circle'
+        buffer_shape = self.settings_dict.get('buffer_shape', 'square')
+        self.buffer_stencil_dict = {i: util.buffer_stencil(self.technology_dict[i]['buffer_in_km'],
+                                                           cell_size=cell_size,
+                                                           shape=buffer_shape) for i in self.technology_order}
+
+        # place non-overlapping winners in batches rather than one per iteration
+        self.batch_placement = self.settings_dict.get('batch_placement', False)
 
-        # mask any technologies having 0 expected sites in the expansion plan to exclude them from competition
+        # exclude any technologies having 0 expected sites in the expansion plan from competition
+        active = np.ones(self.nlc_mask_shape[0], dtype=bool)
         for index, i in enumerate(self.technology_order, 1):
             if expansion_dict[i]["n_sites"] == 0:
-                self.nlc_mask[index, :, :] = np.ma.masked_array(self.nlc_mask[index, :, :],
-                                                                np.ones_like(self.nlc_mask[index, :, :]))
+                active[index] = False
 
-        # show cheapest option, add 1 to the index to represent the technology number
-        self.cheapest_arr = np.argmin(self.nlc_mask, axis=0)
+        # track the cheapest option per grid cell where 0 represents no available technology
+        self.winners = CheapestTracker(self.nlc_mask, active)
 
-        # flatten cheapest array to be able to use random
-        self.cheapest_arr_1d = self.cheapest_arr.flatten()
+        # flat cheapest array to be able to use random; this is shared with the tracker
+        self.cheapest_arr_1d = self.winners.best
+        self.cheapest_arr = self.cheapest_arr_1d.reshape(self.nlc_mask_shape[1:])
 
         # prep array to hold outputs
         self.sited_arr_1d = np.zeros_like(self.cheapest_arr_1d)
 
         # set initial value to for available grid cells
-        self.avail_grids = np.where(self.cheapest_arr_1d > 0)[0].shape[0]
+        self.avail_grids = self.winners.n_available
 
         # create dictionary of {tech_id: flat_nlc_array, ...}
-        self.nlc_flat_dict = {i: self.nlc_mask[ix+1, :, :].flatten() for ix, i in enumerate(self.technology_order)}
+        self.nlc_flat_dict = {i: self.winners.nlc_flat[ix+1] for ix, i in enumerate(self.technology_order)}
 
         # run competition and site
         self.sited_array, self.sited_df = self.compete()
@@ -162,6 +395,153 @@ class Competition:
             if remaining_sites > 0:
                 logging.warning(f"Unable to achieve full siting for `{tech_name}` in `{self.target_region_name}`:  {remaining_sites} unsited.")
 
+    def next_available(self, tech_sorted, position, tech_index, chunk_size=64):
+        """Find the first position at or after `position` in the NLC ordered winners of a technology that is still
+        available to site.  Cells excluded by a buffer are lazily skipped by scanning in growing chunks.
+
+        :param tech_sorted:                         Flat grid indices won by the technology ordered by NLC
+        :type tech_sorted:                          ndarray
+
+        :param position:                            Position in `tech_sorted` to start the search from
+        :type position:                             int
+
+        :param tech_index:                          Index of the technology in the NLC array
+        :type tech_index:                           int
+
+        :param chunk_size:                          Number of positions to evaluate in the first chunk
+        :type chunk_size:                           int
+
+        :return:                                    Position of the next available winner; the length of
+                                                    `tech_sorted` if none remain
+
+        """
+
+        n_winners = tech_sorted.shape[0]
+
+        while position < n_winners:
+
+            available = self.cheapest_arr_1d[tech_sorted[position:position + chunk_size]] == tech_index
+
+            if available.any():
+                return position + int(np.argmax(available))
+
+            position += chunk_size
+            chunk_size *= 2
+
+        return n_winners
+
+    @staticmethod
+    def conflict_free_prefix(candidates, ncols, stencil):
+        """Get the number of leading candidates whose buffers do not contain any earlier candidate.  Siting these
+        in order one at a time would never exclude one of them, so they can all be sited at once.
+
+        Candidates are binned on a coarse tile grid having tiles the size of the buffer so that only candidates in the
+        same or adjacent tiles are tested against the buffer stencil.
+
+        :param candidates:                          Flat grid cell indices of available winners in siting order
+        :type candidates:                           ndarray
+
+        :param ncols:                               The number of columns in the 2D grid space
+        :type ncols:                                int
+
+        :param stencil:                             Row and column offsets of the buffer from `util.buffer_stencil`
+        :type stencil:                              tuple
+
+        :return:                                    Number of leading candidates that can be sited together
+
+        """
+
+        n_candidates = candidates.shape[0]
+
+        row_offsets, col_offsets = stencil
+        row_reach = int(np.abs(row_offsets).max())
+        col_reach = int(np.abs(col_offsets).max())
+
+        rows, cols = np.divmod(candidates, ncols)
+
+        # candidates more than one tile apart can never fall within each other's buffer
+        tile_rows = rows // (row_reach + 1)
+        tile_cols = cols // (col_reach + 1)
+        near = (np.abs(tile_rows[:, np.newaxis] - tile_rows) <= 1) & (np.abs(tile_cols[:, np.newaxis] - tile_cols) <= 1)
+
+        # only pairs where the later candidate follows an earlier one matter
+        earlier, later = np.nonzero(np.triu(near, k=1))
+
+        if earlier.shape[0] == 0:
+            return n_candidates
+
+        # footprint of the buffer as a 2D boolean window centered on the site
+        footprint = np.zeros((2 * row_reach + 1, 2 * col_reach + 1), dtype=bool)
+        footprint[row_offsets + row_reach, col_offsets + col_reach] = True
+
+        row_delta = rows[later] - rows[earlier]
+        col_delta = cols[later] - cols[earlier]
+        within = (np.abs(row_delta) <= row_reach) & (np.abs(col_delta) <= col_reach)
+        within[within] = footprint[row_delta[within] + row_reach, col_delta[within] + col_reach]
+
+        if within.any():
+            return int(later[within].min())
+
+        return n_candidates
+
+    def place_batches(self, tech_id, tech_index, tech_sorted, required_sites, chunk_size=64, max_chunk_size=1024):
+        """Site the NLC ordered winners of a technology in batches of available grid cells whose buffers do not
+        overlap.
+
+        :param tech_id:                             Technology ID as in the technology dictionary
+        :type tech_id:                              int
+
+        :param tech_index:                          Index of the technology in the NLC array
+        :type tech_index:                           int
+
+        :param tech_sorted:                         Flat grid indices won by the technology ordered by NLC and grid index
+        :type tech_sorted:                          ndarray
+
+        :param required_sites:                      Number of sites left to site for the technology
+        :type required_sites:                       int
+
+        :param chunk_size:                          Number of winners to evaluate in the first batch
+        :type chunk_size:                           int
+
+        :param max_chunk_size:                      Maximum number of winners to evaluate in a batch
+        :type max_chunk_size:                       int
+
+        :return:                                    Number of sites left to site for the technology
+
+        """
+
+        nrows, ncols = self.cheapest_arr.shape
+        stencil = self.buffer_stencil_dict[tech_id]
+
+        position = self.next_available(tech_sorted, 0, tech_index)
+
+        while required_sites > 0 and position < tech_sorted.shape[0]:
+
+            # winners that are still available in siting order, up to the number of sites needed
+            window = tech_sorted[position:position + chunk_size]
+            candidates = window[self.cheapest_arr_1d[window] == tech_index][:required_sites]
+
+            n_sited = self.conflict_free_prefix(candidates, ncols, stencil)
+            sites = candidates[:n_sited]
+
+            # record the sites and exclude them and their buffers from further siting for all technologies
+            self.records.extend(sites, tech_index)
+            self.winners.exclude(util.stencil_flat_indices(target_index=sites,
+                                                           nrows=nrows,
+                                                           ncols=ncols,
+                                                           stencil=stencil))
+
+            required_sites -= n_sited
+            self.expansion_dict[tech_id].update(n_sites=required_sites)
+
+            # evaluate more winners at once while batches are free of overlapping buffers
+            if n_sited == candidates.shape[0]:
+                chunk_size = min(2 * chunk_size, max_chunk_size)
+
+            position = self.next_available(tech_sorted, position, tech_index)
+
+        return required_sites
+
     def compete(self):
 
         # initialize keep sighting designation; False if no more sites or area to site
@@ -182,127 +562,70 @@ class Competition:
                 # the number of sites for the target tech
                 required_sites = self.expansion_dict[tech_id]['n_sites']
 
-                # calculate the year of retirement
-                retirement_year = self.settings_dict['run_year'] + int(self.technology_dict[tech_id]['operational_life_yrs'])
-
                 # if there are more power plants to site and there are grids available to site them...
                 if self.avail_grids > 0 and tech.shape[0] > 0 and required_sites > 0:
 
                     # site with buffer and exclude buffered area from further siting
                     still_siting = True
-                    sited_list = []
-                    while still_siting:
 
-                        # get the NLC values associated with each winner
-                        tech_nlc = self.nlc_flat_dict[tech_id][tech]
+                    # order the winners by NLC; the sort is stable so equal NLC values stay in grid index order
+                    tech_nlc = self.nlc_flat_dict[tech_id][tech]
+                    sort_order = np.argsort(tech_nlc, kind='stable')
+                    tech_sorted = tech[sort_order]
+                    tech_nlc_sorted = tech_nlc[sort_order]
+
+                    if self.batch_placement:
+                        self.place_batches(tech_id, tech_index, tech_sorted, required_sites)
+                        still_siting = False
+
+                    else:
+                        # position of the least expensive winner that has not been excluded by a buffer
+                        position = self.next_available(tech_sorted, 0, tech_index)
+
+                    while still_siting:
 
-                        # get the least expensive NLC indices from the winners
-                        tech_nlc_cheap = tech[np.where(tech_nlc == np.nanmin(tech_nlc))]
+                        # get the least expensive NLC indices from the remaining winners
+                        tie_end = np.searchsorted(tech_nlc_sorted, tech_nlc_sorted[position], side='right')
+                        tech_nlc_cheap = tech_sorted[position:tie_end]
+                        tech_nlc_cheap = tech_nlc_cheap[self.cheapest_arr_1d[tech_nlc_cheap] == tech_index]
 
                         # select a random index that has a winning cell for the check where multiple low NLC may exists
                         target_ix = np.random.choice(tech_nlc_cheap)
 
-                        # add selected index to sited dictionary
-                        self.sited_dict['region_name'].append(self.target_region_name)
-                        self.sited_dict['tech_id'].append(tech_id)
-                        self.sited_dict['tech_name'].append(self.technology_dict[tech_id]['tech_name'])
-                        self.sited_dict['unit_size_mw'].append(self.technology_dict[tech_id]['unit_size_mw'])
-                        self.sited_dict['xcoord'].append(self.xcoords[target_ix])
-                        self.sited_dict['ycoord'].append(self.ycoords[target_ix])
-                        self.sited_dict['index'].append(self.indices_flat[target_ix])
-                        self.sited_dict['buffer_in_km'].append(self.technology_dict[tech_id]['buffer_in_km'])
-                        self.sited_dict['sited_year'].append(self.settings_dict['run_year'])
-                        self.sited_dict['retirement_year'].append(retirement_year)
-                        self.sited_dict['lmp_zone'].append(self.zones_flat_arr[target_ix])
-                        self.sited_dict['locational_marginal_price_usd_per_mwh'].append(self.lmp_flat_dict[tech_id][target_ix])
-                        self.sited_dict['generation_mwh_per_year'].append(self.generation_flat_dict[tech_id][target_ix])
-                        self.sited_dict['operating_cost_usd_per_year'].append(self.operating_cost_flat_dict[tech_id][target_ix])
-                        self.sited_dict['net_operational_value_usd_per_year'].append(self.nov_flat_dict[tech_id][target_ix])
-                        self.sited_dict['interconnection_cost_usd_per_year'].append(self.ic_flat_dict[tech_id][target_ix])
-                        self.sited_dict['net_locational_cost_usd_per_year'].append(self.nlc_flat_dict[tech_id][target_ix])
-                        self.sited_dict['capacity_factor_fraction'].append(self.technology_dict[tech_id]["capacity_factor_fraction"])
-                        self.sited_dict['carbon_capture_rate_fraction'].append(self.technology_dict[tech_id]["carbon_capture_rate_fraction"])
-                        self.sited_dict['fuel_co2_content_tons_per_btu'].append(self.technology_dict[tech_id]["fuel_co2_content_tons_per_btu"])
-                        self.sited_dict['fuel_price_usd_per_mmbtu'].append(self.technology_dict[tech_id]["fuel_price_usd_per_mmbtu"])
-                        self.sited_dict['fuel_price_esc_rate_fraction'].append(self.technology_dict[tech_id]["fuel_price_esc_rate_fraction"])
-                        self.sited_dict['heat_rate_btu_per_kWh'].append(self.technology_dict[tech_id]["heat_rate_btu_per_kWh"])
-                        self.sited_dict['lifetime_yrs'].append(self.technology_dict[tech_id]["lifetime_yrs"])
-                        self.sited_dict['operational_life_yrs'].append(self.technology_dict[tech_id]["operational_life_yrs"])
-                        self.sited_dict['variable_om_usd_per_mwh'].append(self.technology_dict[tech_id]["variable_om_usd_per_mwh"])
-                        self.sited_dict['variable_om_esc_rate_fraction'].append(self.technology_dict[tech_id]["variable_om_esc_rate_fraction"])
-                        self.sited_dict['carbon_tax_usd_per_ton'].append(self.technology_dict[tech_id]["carbon_tax_usd_per_ton"])
-                        self.sited_dict['carbon_tax_esc_rate_fraction'].append(self.technology_dict[tech_id]["carbon_tax_esc_rate_fraction"])
-
-                        # add selected index to list
-                        sited_list.append(target_ix)
-
-                        # apply buffer
-                        result = util.buffer_flat_array(target_index=target_ix,
-                                                        arr=self.cheapest_arr_1d,
-                                                        nrows=self.cheapest_arr.shape[0],
-                                                        ncols=self.cheapest_arr.shape[1],
-                                                        ncells=self.technology_dict[tech_id]['buffer_in_km'],
-                                                        set_value=0)
-
-                        # unpack values
-                        self.cheapest_arr_1d, buffer_indices_list = result
+                        # record the selected index
+                        self.records.append(target_ix, tech_index)
+
+                        # exclude the site and its buffer from further siting for all technologies
+                        buffer_indices = util.stencil_flat_indices(target_index=target_ix,
+                                                                   nrows=self.cheapest_arr.shape[0],
+                                                                   ncols=self.cheapest_arr.shape[1],
+                                                                   stencil=self.buffer_stencil_dict[tech_id])
+                        self.winners.exclude(buffer_indices)
 
                         # update the number of sites left to site
                         required_sites -= 1
                         self.expansion_dict[tech_id].update(n_sites=required_sites)
 
-                        # remove any buffered elements as an option to site
-                        tech_indices_to_delete = [np.where(tech == i)[0][0] for i in buffer_indices_list if i in tech]
-                        tech = np.delete(tech, tech_indices_to_delete)
+                        # buffered elements are no longer an option to site; skip past them
+                        position = self.next_available(tech_sorted, position, tech_index)
 
                         # exit siting for the target technology if all sites have been sited or if there are no more
                         #   winning cells
-                        if required_sites == 0 or tech.shape[0] == 0:
+                        if required_sites == 0 or position == tech_sorted.shape[0]:
                             still_siting = False
 
-                    # array of the site indices
-                    rdx = np.array(sited_list)
-
-                    # add sited techs to output array
-                    self.sited_arr_1d[rdx] = tech_id
-
                     if self.verbose:
                         logging.info('\nUpdate expansion plan to represent siting requirements:')
                         logging.info(self.expansion_dict)
 
-                    # update original array with excluded area where siting occurred
-                    # if target technology has no more sites to be sited
-                    if self.expansion_dict[tech_id] == 0:
-
-                        # make all elements for the target tech in the NLC mask unsuitable so we can progress
-                        self.nlc_mask[tech_index, :, :] = np.ma.masked_array(self.nlc_mask[0, :, :],
-                                                                             np.ones_like(self.nlc_mask[0, :, :]))
-
-                    # apply the new exclusion from the current technology to all techs...
-                    #   invert sited elements to have a value of 1 so they can be used as a mask
-                    #   repeat the new sited array to create a mask for all techs and reshape to 2D
-                    #   update all technologies with the new mask
-                    self.nlc_mask[1:, :, :] = np.ma.masked_array(self.nlc_mask[1:, :, :],
-                                                                 np.tile(np.where(self.cheapest_arr_1d == 0, 1, 0),
-                                                                         self.nlc_mask_shape[0] - 1).reshape(
-                                                                     (self.nlc_mask_shape[0] - 1,
-                                                                      self.nlc_mask_shape[1],
-                                                                      self.nlc_mask_shape[2])))
-
-                    # if the technology has achieved its full expansion, then mask the rest of its suitable area so
-                    #  other technologies can now compete for the grid cells it previously won but now no longer needs
+                    # buffered grid cells have been set to 0 in the cheapest array which excludes them for all
+                    #   technologies; if the technology has achieved its full expansion, then retire it so other
+                    #   technologies can now compete for the grid cells it previously won but now no longer needs
                     if self.expansion_dict[tech_id]['n_sites'] == 0:
-                        self.nlc_mask[tech_index, :, :] = np.ma.masked_array(self.nlc_mask[tech_index, :, :],
-                                                                             np.ones_like(self.nlc_mask[tech_index, :, :]))
-
-                    # show cheapest option, add 1 to the index to represent the technology number
-                    self.cheapest_arr = np.argmin(self.nlc_mask, axis=0)
-
-                    # flatten cheapest array to be able to use random
-                    self.cheapest_arr_1d = self.cheapest_arr.flatten()
+                        self.winners.retire(tech_index)
 
                     # check for any available grids to site in
-                    self.avail_grids = np.where(self.cheapest_arr_1d > 0)[0].shape[0]
+                    self.avail_grids = self.winners.n_available
 
                     # are there any sites left to site
                     left_to_site = sum([self.expansion_dict[i]['n_sites'] for i in self.expansion_dict.keys()])
@@ -321,26 +644,98 @@ class Competition:
                 # if there are available grids and a cheapest option available but no more required sites
                 elif self.avail_grids > 0 and tech.shape[0] > 0 and required_sites == 0:
 
-                    # if there are no required sites, then mask the rest of the techs suitable area so
-                    #  other technologies can now compete for the grid cells it previously won but now no longer needs
-                    self.nlc_mask[tech_index, :, :] = np.ma.masked_array(self.nlc_mask[tech_index, :, :],
-                                                                         np.ones_like(self.nlc_mask[tech_index, :, :]))
-
-                    # show cheapest option, add 1 to the index to represent the technology number
-                    self.cheapest_arr = np.argmin(self.nlc_mask, axis=0)
-
-                    # flatten cheapest array to be able to use random
-                    self.cheapest_arr_1d = self.cheapest_arr.flatten()
+                    # if there are no required sites, then retire the tech so other technologies can now compete
+                    #  for the grid cells it previously won but now no longer needs
+                    self.winners.retire(tech_index)
 
                     # check for any available grids to site in
-                    self.avail_grids = np.where(self.cheapest_arr_1d > 0)[0].shape[0]
+                    self.avail_grids = self.winners.n_available
 
                 # if there are suitable cells AND no winners and some or no sites left to site pass until next round
                 else:
                     pass
 
         # create sited data frame
-        df = pd.DataFrame(self.sited_dict).astype(util.sited_dtypes())
+        df = self.build_sited_data()
 
         # reshape output array to 2D
         return self.sited_arr_1d.reshape(self.cheapest_arr.shape), df
+
+    def gather_tech_values(self, flat_dict, site_index, tech_index):
+        """Gather the values of a {tech_id: flat_array, ...} dictionary for each site from its own technology.
+
+        :param flat_dict:                           Dictionary of {tech_id: flat_array, ...}
+        :type flat_dict:                            dict
+
+        :param site_index:                          Flat grid cell index of each site
+        :type site_index:                           ndarray
+
+        :param tech_index:                          Index of the technology of each site as in the NLC array
+        :type tech_index:                           ndarray
+
+        :return:                                    1D array of values per site
+
+        """
+
+        values = np.empty(site_index.shape[0], dtype=np.asarray(flat_dict[self.technology_order[0]]).dtype)
+
+        for index, tech_id in enumerate(self.technology_order, 1):
+            target = tech_index == index
+            values[target] = np.asarray(flat_dict[tech_id])[site_index[target]]
+
+        return values
+
+    def build_sited_data(self):
+        """Gather the attributes of all sited power plants into the sited dictionary and data frame."""
+
+        site_index, tech_index = self.records.sites()
+
+        # technology attributes joined from a table having a row per technology in processing order
+        tech_fields = ['tech_name', 'unit_size_mw', 'buffer_in_km', 'capacity_factor_fraction',
+                       'carbon_capture_rate_fraction', 'fuel_co2_content_tons_per_btu', 'fuel_price_usd_per_mmbtu',
+                       'fuel_price_esc_rate_fraction', 'heat_rate_btu_per_kWh', 'lifetime_yrs',
+                       'operational_life_yrs', 'variable_om_usd_per_mwh', 'variable_om_esc_rate_fraction',
+                       'carbon_tax_usd_per_ton', 'carbon_tax_esc_rate_fraction']
+
+        tech_df = pd.DataFrame([{k: self.technology_dict[i][k] for k in tech_fields} for i in self.technology_order])
+        tech_df['tech_id'] = self.technology_order
+        tech_df['retirement_year'] = [self.settings_dict['run_year'] + int(self.technology_dict[i]['operational_life_yrs'])
+                                      for i in self.technology_order]
+
+        df = tech_df.take(tech_index - 1).reset_index(drop=True)
+
+        df['region_name'] = self.target_region_name
+        df['sited_year'] = self.settings_dict['run_year']
+        # index of each site in the full grid space
+        if self.grid_index is None:
+            site_grid_index = self.indices_flat[site_index]
+        else:
+            site_grid_index = self.grid_index.to_grid(site_index)
+
+        # compute coordinates for the sites only if they can be derived from the grid index
+        if self.coordinates is None:
+            df['xcoord'] = self.xcoords[site_index]
+            df['ycoord'] = self.ycoords[site_index]
+        else:
+            df['xcoord'], df['ycoord'] = self.coordinates.xy(site_grid_index)
+        df['index'] = site_grid_index
+        df['lmp_zone'] = self.zones_flat_arr[site_index]
+
+        # gather metrics for each site from its technology
+        df['locational_marginal_price_usd_per_mwh'] = self.gather_tech_values(self.lmp_flat_dict, site_index, tech_index)
+        df['generation_mwh_per_year'] = self.gather_tech_values(self.generation_flat_dict, site_index, tech_index)
+        df['operating_cost_usd_per_year'] = self.gather_tech_values(self.operating_cost_flat_dict, site_index, tech_index)
+        df['net_operational_value_usd_per_year'] = self.gather_tech_values(self.nov_flat_dict, site_index, tech_index)
+        df['interconnection_cost_usd_per_year'] = self.gather_tech_values(self.ic_flat_dict, site_index, tech_index)
+        df['net_locational_cost_usd_per_year'] = self.gather_tech_values(self.nlc_flat_dict, site_index, tech_index)
+
+        # order fields as they are in the sited dictionary
+        df = df[list(util.empty_sited_dict().keys())]
+
+        # add sited techs to output array
+        self.sited_arr_1d[site_index] = df['tech_id'].values
+
+        # dictionary of sited information as {field: [value, ...], ...}
+        self.sited_dict = {k: df[k].tolist() for k in df.columns}
+
+        return df.astype(util.sited_dtypes())
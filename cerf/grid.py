@@ -0,0 +1,178 @@
+"""Grid space indexing and coordinates for CERF.
+
+@author Chris R. vernon
+@email chris.vernon@pnnl.gov
+
+License:  BSD 2-Clause, see LICENSE and DISCLAIMER files
+
+"""
+
+import numpy as np
+import rasterio
+from rasterio.transform import Affine, rowcol
+
+
+class GridIndex:
+    """Convert between flat indices of the full grid space, rows and columns, and flat offsets within a bounding box
+    of the grid space arithmetically instead of holding an array of indices for every grid cell.
+
+    :param shape:                       The (height, width) of the full grid space
+    :type shape:                        tuple
+
+    :param bounds:                      Bounding box as (ymin, ymax, xmin, xmax) grid cell positions of the window
+                                        that offsets refer to.  If None, the window is the full grid space.
+    :type bounds:                       tuple
+
+    """
+
+    def __init__(self, shape, bounds=None):
+
+        self.shape = tuple(int(i) for i in shape)
+
+        if bounds is None:
+            bounds = (0, self.shape[0], 0, self.shape[1])
+
+        self.bounds = tuple(int(i) for i in bounds)
+
+    @property
+    def window_shape(self):
+        """The (height, width) of the window."""
+
+        ymin, ymax, xmin, xmax = self.bounds
+
+        return ymax - ymin, xmax - xmin
+
+    def window(self, bounds):
+        """Get the index of a bounding box within the current window.
+
+        :param bounds:                  Bounding box as (ymin, ymax, xmin, xmax) grid cell positions relative to the
+                                        current window
+        :type bounds:                   tuple
+
+        :return:                        GridIndex of the bounding box
+
+        """
+
+        ymin, ymax, xmin, xmax = bounds
+
+        return GridIndex(self.shape, (self.bounds[0] + ymin, self.bounds[0] + ymax,
+                                      self.bounds[2] + xmin, self.bounds[2] + xmax))
+
+    def rowcol(self, index):
+        """Get the row and column of flat indices of the full grid space.
+
+        :param index:                   Flat index or array of flat indices in the full grid space
+        :type index:                    int; ndarray
+
+        :return:                        [0] row of each index
+                                        [1] column of each index
+
+        """
+
+        return np.divmod(np.asarray(index, dtype=np.int64), self.shape[1])
+
+    def flat(self, rows, cols):
+        """Get the flat indices of the full grid space for rows and columns.
+
+        :param rows:                    Row or array of rows in the full grid space
+        :type rows:                     int; ndarray
+
+        :param cols:                    Column or array of columns in the full grid space
+        :type cols:                     int; ndarray
+
+        :return:                        Flat index or array of flat indices
+
+        """
+
+        return np.asarray(rows, dtype=np.int64) * self.shape[1] + np.asarray(cols, dtype=np.int64)
+
+    def to_grid(self, offsets):
+        """Get the flat indices of the full grid space from flat offsets within the window.
+
+        :param offsets:                 Flat offset or array of flat offsets within the window
+        :type offsets:                  int; ndarray
+
+        :return:                        Flat index or array of flat indices in the full grid space
+
+        """
+
+        rows, cols = np.divmod(np.asarray(offsets, dtype=np.int64), self.window_shape[1])
+
+        return self.flat(rows + self.bounds[0], cols + self.bounds[2])
+
+
+class GridCoordinates(GridIndex):
+    """Compute the X and Y coordinates of grid cell centers from the affine transform of the grid space on demand
+    instead of holding a coordinate array for every grid cell.
+
+    :param transform:                   Affine transform of the grid space as reported by the raster
+    :type transform:                    Affine
+
+    :param shape:                       The (height, width) of the grid space
+    :type shape:                        tuple
+
+    """
+
+    def __init__(self, transform, shape):
+
+        super(GridCoordinates, self).__init__(shape)
+
+        self.transform = transform
+
+        # transform to the center of each grid cell
+        self.center_transform = transform * Affine.translation(0.5, 0.5)
+
+    @classmethod
+    def from_raster(cls, raster_file):
+        """Build the coordinates of the grid space of a raster.
+
+        :param raster_file:             Full path with file name and extension to the input raster
+        :type raster_file:              str
+
+        """
+
+        with rasterio.open(raster_file) as src:
+            return cls(src.transform, (src.height, src.width))
+
+    def xy(self, index):
+        """Get the X and Y coordinates of the center of grid cells from their flat grid indices.
+
+        :param index:                   Flat index or array of flat indices in the grid space
+        :type index:                    int; ndarray
+
+        :return:                        [0] X coordinate of each index
+                                        [1] Y coordinate of each index
+
+        """
+
+        rows, cols = self.rowcol(index)
+
+        t = self.center_transform
+
+        return cols * t.a + rows * t.b + t.c, cols * t.d + rows * t.e + t.f
+
+    def index(self, x, y):
+        """Get the flat grid indices of the grid cells containing X and Y coordinates using the inverse of the affine
+        transform.
+
+        :param x:                       Array of X coordinates
+        :type x:                        ndarray
+
+        :param y:                       Array of Y coordinates
+        :type y:                        ndarray
+
+        :return:                        [0] Array of flat indices in the grid space
+                                        [1] Boolean array where True is a coordinate within the grid space
+
+        """
+
+        if len(x) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=bool)
+
+        rows, cols = rowcol(self.transform, np.asarray(x), np.asarray(y))
+        rows = np.atleast_1d(np.asarray(rows, dtype=np.int64))
+        cols = np.atleast_1d(np.asarray(cols, dtype=np.int64))
+
+        valid = (rows >= 0) & (rows < self.shape[0]) & (cols >= 0) & (cols < self.shape[1])
+
+        return np.where(valid, self.flat(rows, cols), 0), valid
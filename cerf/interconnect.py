@@ -1,6 +1,5 @@
 import os
 import logging
-import tempfile
 
 import geopandas as gpd
 import numpy as np
@@ -10,7 +9,8 @@ from scipy.ndimage import distance_transform_edt
 import yaml
 
 import cerf.package_data as pkg
-from cerf.utils import suppress_callback
+from cerf.cache import StagingCache, cache_key, dataset_files
+from cerf.utils import suppress_callback, window_slices
 
 
 class Interconnection:
@@ -100,13 +100,27 @@ class Interconnection:
     :param output_dir:                      Full path to a directory to write outputs to if desired
     :type output_dir:                       str
 
+    :param cache_directory:                 Full path to a directory to cache the distance and allocation fields of the
+                                            substations and pipelines in.  The fields are keyed by the content of the
+                                            infrastructure and cost inputs and the region raster so that only the
+                                            technology economics are recalculated on later runs.  If None, the fields
+                                            are not cached.
+    :type cache_directory:                  str
+
+    :param window:                          Bounding box as (ymin, ymax, xmin, xmax) grid cell positions of the region
+                                            raster to calculate costs for.  Distances are still measured to the
+                                            nearest infrastructure anywhere in the grid space.  If None, costs are
+                                            calculated for the entire grid space.
+    :type window:                           tuple
+
     """
 
     def __init__(self, template_array, technology_dict, technology_order, region_raster_file,
                  region_abbrev_to_name_file, region_name_to_id_file, substation_file=None,
                  transmission_costs_dict=None, transmission_costs_file=None, pipeline_costs_dict=None,
                  pipeline_costs_file=None, pipeline_file=None, output_rasterized_file=False, output_dist_file=False,
-                 output_alloc_file=False, output_cost_file=False, interconnection_cost_file=None, output_dir=None):
+                 output_alloc_file=False, output_cost_file=False, interconnection_cost_file=None, output_dir=None,
+                 cache_directory=None, window=None):
 
         self.template_array = template_array
         self.technology_dict = technology_dict
@@ -126,6 +140,8 @@ class Interconnection:
         self.output_cost_file = output_cost_file
         self.interconnection_cost_file = interconnection_cost_file
         self.output_dir = output_dir
+        self.cache_directory = cache_directory
+        self.window = window
 
         # calculate electricity transmission infrastructure costs
         self.substation_costs = self.transmission_to_cost_raster(setting='substations')
@@ -258,6 +274,21 @@ class Interconnection:
             return gdf
 
 
+    def cache_inputs(self, setting):
+        """Inputs that determine the distance and allocation fields for either 'substations' or 'pipelines'."""
+
+        if setting == 'substations':
+            return (setting, dataset_files(self.substation_file), self.transmission_costs_dict,
+                    self.transmission_costs_file, self.region_raster_file)
+
+        elif setting == 'pipelines':
+            return (setting, dataset_files(self.pipeline_file), self.pipeline_costs_dict, self.pipeline_costs_file,
+                    self.region_raster_file)
+
+        else:
+            raise ValueError(
+                f"Incorrect setting '{setting}' for transmission data.  Must be 'substations' or 'pipelines'")
+
     def transmission_to_cost_raster(self, setting):
         """Create a cost per grid cell in $/km from the input GeoDataFrame of transmission infrastructure having a cost
         designation field as '_rval_'.
@@ -267,6 +298,38 @@ class Interconnection:
 
         :return:                                Array of transmission interconnection cost per grid cell
 
+        """
+
+        write_output = any((self.output_rasterized_file, self.output_dist_file, self.output_alloc_file,
+                            self.output_cost_file))
+
+        # outputs are written while building the fields so they are only loaded from the cache when not requested
+        if (self.cache_directory is None) or write_output:
+            distance_array, allocation_array = self.distance_allocation_fields(setting)
+
+        else:
+            cache = StagingCache(self.cache_directory)
+            distance_array, allocation_array = cache.get_or_compute((f'ic_distance_{setting}',
+                                                                     f'ic_allocation_{setting}'),
+                                                                    cache_key(*self.cache_inputs(setting)),
+                                                                    lambda: self.distance_allocation_fields(setting),
+                                                                    compressed=True)
+
+        rows, cols = window_slices(self.window)
+
+        # distance in km * the cost of the nearest substation; outputs thous$/km
+        return distance_array[rows, cols] * allocation_array[rows, cols]
+
+    def distance_allocation_fields(self, setting):
+        """Rasterize the input transmission infrastructure and calculate the distance to and the cost designation of
+        the nearest infrastructure for each grid cell.  Rasters are only written if an output has been requested.
+
+        :param setting:                         Either 'substations' or 'pipelines'
+        :type setting:                          str
+
+        :return:                                [0] Array of distance to the nearest infrastructure per grid cell
+                                                [1] Array of the cost designation of the nearest infrastructure
+
         """
         if setting == 'substations':
             infrastructure_gdf = self.process_substations()
@@ -294,76 +357,60 @@ class Interconnection:
             # get shapes
             shapes = ((geom, value) for geom, value in zip(infrastructure_gdf.geometry, infrastructure_gdf['_rval_']))
 
-        with tempfile.TemporaryDirectory() as tempdir:
-
-            # if write desired
-            if any((self.output_rasterized_file, self.output_dist_file, self.output_alloc_file, self.output_cost_file)):
-
-                if self.output_dir is None:
-                    msg = "If writing rasters to file must specify 'output_dir'"
-                    logging.error(msg)
-                    raise NotADirectoryError(msg)
-
-                else:
-                    out_rast = os.path.join(self.output_dir, f'cerf_transmission_raster_{setting}.tif')
-                    out_dist = os.path.join(self.output_dir, f'cerf_transmission_distance_{setting}.tif')
-                    out_alloc = os.path.join(self.output_dir, f'cerf_transmission_allocation_{setting}.tif')
-                    out_costs = os.path.join(self.output_dir, f'cerf_transmission_costs_{setting}.tif')
-            else:
-                out_rast = os.path.join(tempdir, f'cerf_transmission_raster_{setting}.tif')
-                out_dist = os.path.join(tempdir, f'cerf_transmission_distance_{setting}.tif')
-                out_alloc = os.path.join(tempdir, f'cerf_transmission_allocation_{setting}.tif')
-                out_costs = os.path.join(tempdir, f'cerf_transmission_costs_{setting}.tif')
-
-            # update source file nodata value to nan to ensure a fill of 0 can occur for the background
-            metadata.update({"nodata": -np.nan})
-
-            # rasterize transmission vector data and write to memory
-            with rasterio.open(out_rast, 'w', **metadata) as dataset:
-
-                # burn features into raster
-                burned = features.rasterize(shapes=shapes, fill=0, out=arr, transform=dataset.transform)
-
-                # write the outputs to file
-                dataset.write_band(1, burned)
+        # burn features into raster
+        burned = features.rasterize(shapes=shapes, fill=0, out=arr, transform=metadata['transform'])
 
-            # create a mask of target (non-zero) cells
-            target_cells = burned != 0
+        # create a mask of target (non-zero) cells
+        target_cells = burned != 0
 
-            # calculate the Euclidean distance and the indices of the nearest target cell
-            distance_array, nearest_indices = distance_transform_edt(
-                ~target_cells, 
-                return_distances=True, 
-                return_indices=True
-            )
+        # calculate the Euclidean distance and the indices of the nearest target cell
+        distance_array, nearest_indices = distance_transform_edt(
+            ~target_cells,
+            return_distances=True,
+            return_indices=True
+        )
 
-            # use the nearest indices to map the value of the nearest target to each cell (allocation map)
-            nearest_row_indices, nearest_col_indices = nearest_indices
-            allocation_array = burned[nearest_row_indices, nearest_col_indices]
+        # use the nearest indices to map the value of the nearest target to each cell (allocation map)
+        nearest_row_indices, nearest_col_indices = nearest_indices
+        allocation_array = burned[nearest_row_indices, nearest_col_indices]
 
-            with rasterio.open(out_dist, 'w', **metadata) as dist_ds:
-                dist_ds.write(distance_array.astype(rasterio.float64), 1)
+        # if write desired
+        if any((self.output_rasterized_file, self.output_dist_file, self.output_alloc_file, self.output_cost_file)):
 
-            with rasterio.open(out_alloc, 'w', **metadata) as alloc_ds:
-                alloc_ds.write(allocation_array.astype(rasterio.float64), 1)
+            if self.output_dir is None:
+                msg = "If writing rasters to file must specify 'output_dir'"
+                logging.error(msg)
+                raise NotADirectoryError(msg)
 
-            with rasterio.open(out_costs, 'w', **metadata) as out:
+            # update source file nodata value to nan to ensure a fill of 0 can occur for the background
+            metadata.update({"nodata": -np.nan})
 
-                # distance in km * the cost of the nearest substation; outputs thous$/km
-                cost_arr = distance_array * allocation_array
+            outputs = ((f'cerf_transmission_raster_{setting}.tif', burned),
+                       (f'cerf_transmission_distance_{setting}.tif', distance_array),
+                       (f'cerf_transmission_allocation_{setting}.tif', allocation_array),
+                       (f'cerf_transmission_costs_{setting}.tif', distance_array * allocation_array))
 
-                out.write(cost_arr, 1)
+            for file_name, out_arr in outputs:
+                with rasterio.open(os.path.join(self.output_dir, file_name), 'w', **metadata) as dest:
+                    dest.write(out_arr.astype(rasterio.float64), 1)
 
-        return cost_arr
+        return distance_array, allocation_array
 
 
     def generate_interconnection_costs_array(self):
         """Calculate the costs of interconnection for each technology."""
 
-        # if a preprocessed file has been provided, load and return it
+        # if a preprocessed file has been provided, load and return it in the precision of the template array
         if self.interconnection_cost_file is not None:
             logging.info(f"Using prebuilt interconnection costs file:  {self.interconnection_cost_file}")
-            return np.load(self.interconnection_cost_file)
+
+            if self.window is None:
+                return np.load(self.interconnection_cost_file).astype(self.template_array.dtype, copy=False)
+
+            rows, cols = window_slices(self.window)
+
+            return np.array(np.load(self.interconnection_cost_file, mmap_mode='r')[:, rows, cols],
+                            dtype=self.template_array.dtype)
 
         # set up array to hold interconnection costs
         ic_arr = np.zeros_like(self.template_array)
@@ -1,5 +1,9 @@
+import os
+
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 import logging
 
@@ -52,6 +56,104 @@ def generate_random_lmp_dataframe(n_zones=57, low_value=10, mid_value=300, high_
     return pd.DataFrame(d)
 
 
+# LMP file formats by file extension
+PARQUET_EXTENSIONS = ('.parquet', '.pq')
+FEATHER_EXTENSIONS = ('.feather', '.arrow')
+NPZ_EXTENSIONS = ('.npz',)
+
+
+def lmp_zone_from_column(column_name):
+    """Get the LMP zone of a column in an hourly LMP file or None if the column is not a zone (e.g., 'hour')."""
+
+    try:
+        return int(column_name)
+
+    except ValueError:
+        return None
+
+
+def read_lmp_file(lmp_file, zones=None):
+    """Read an hourly LMP file of 8760 LMP per zone.  CSV (optionally zipped), Parquet, Feather, and NPZ files are
+    supported.  Parquet, Feather, and NPZ files only read the columns of the requested zones.
+
+    :param lmp_file:                    Full path with file name and extension to the hourly LMP file.  NPZ files hold
+                                        one array per zone named by the zone.
+    :type lmp_file:                     str
+
+    :param zones:                       Zones to read.  If None, all zones are read.
+    :type zones:                        list
+
+    :return:                            Data frame of hourly LMP where each column is a zone
+
+    """
+
+    extension = os.path.splitext(lmp_file)[-1].lower()
+
+    def keep(column_name):
+        zone = lmp_zone_from_column(column_name)
+        return (zone is not None) and ((zones is None) or (zone in zones))
+
+    if zones is not None:
+        zones = set(int(i) for i in zones)
+
+    if extension in PARQUET_EXTENSIONS:
+        columns = [i for i in pq.read_schema(lmp_file).names if keep(i)]
+        return pd.read_parquet(lmp_file, columns=columns)
+
+    elif extension in FEATHER_EXTENSIONS:
+        columns = [i for i in pa.ipc.open_file(lmp_file).schema.names if keep(i)]
+        return pd.read_feather(lmp_file, columns=columns)
+
+    elif extension in NPZ_EXTENSIONS:
+        with np.load(lmp_file) as src:
+            return pd.DataFrame({i: src[i] for i in src.files if keep(i)})
+
+    else:
+        return pd.read_csv(lmp_file, usecols=keep)
+
+
+def convert_lmp_file(lmp_file, output_file, dtype=np.float64):
+    """Convert an hourly LMP file to a columnar binary format that loads faster and only reads the zones in use.  The
+    format is determined by the extension of the output file:  Parquet (.parquet, .pq), Feather (.feather, .arrow),
+    or NPZ (.npz).
+
+    :param lmp_file:                    Full path with file name and extension to the hourly LMP file to convert
+    :type lmp_file:                     str
+
+    :param output_file:                 Full path with file name and extension to the output file
+    :type output_file:                  str
+
+    :param dtype:                       Data type to store the LMP as; either float32 or float64
+    :type dtype:                        type
+
+    :return:                            Full path with file name and extension to the output file
+
+    """
+
+    lmp_df = read_lmp_file(lmp_file).astype(dtype)
+
+    # column names are the zones
+    lmp_df.columns = [str(lmp_zone_from_column(i)) for i in lmp_df.columns]
+
+    extension = os.path.splitext(output_file)[-1].lower()
+
+    if extension in PARQUET_EXTENSIONS:
+        lmp_df.to_parquet(output_file, index=False)
+
+    elif extension in FEATHER_EXTENSIONS:
+        lmp_df.to_feather(output_file)
+
+    elif extension in NPZ_EXTENSIONS:
+        np.savez(output_file, **{i: lmp_df[i].to_numpy() for i in lmp_df.columns})
+
+    else:
+        msg = f"Unsupported LMP output file extension '{extension}'.  Use a Parquet, Feather, or NPZ file."
+        logging.error(msg)
+        raise ValueError(msg)
+
+    return output_file
+
+
 class LocationalMarginalPricing:
     """Create a 3D array of locational marginal pricing per technology by capacity factor.
 
@@ -78,9 +180,12 @@ class LocationalMarginalPricing:
     :param zones_arr:                          An array containing the lmp zones per grid cell
     :type lmp_zone_dict:                       dict
 
+    :param dtype:                              Floating point data type of the LMP array
+    :type dtype:                               type
+
     """
 
-    def __init__(self, lmp_zone_dict, technology_dict, technology_order, zones_arr):
+    def __init__(self, lmp_zone_dict, technology_dict, technology_order, zones_arr, dtype=np.float64):
 
         # dictionary containing lmp zones information
         self.lmp_zone_dict = lmp_zone_dict
@@ -94,6 +199,9 @@ class LocationalMarginalPricing:
         # array containing the lmp zones per grid cell
         self.zones_arr = zones_arr
 
+        # floating point data type of the LMP array
+        self.dtype = dtype
+
     @staticmethod
     def get_cf_bin(capacity_factor_fraction):
         """Get the correct start and through index values to average over for calculating LMP."""
@@ -116,6 +224,62 @@ class LocationalMarginalPricing:
 
         return start_index, through_index
 
+    @staticmethod
+    def zone_lookup_index(zones_arr, max_table_size=2 ** 24):
+        """Map each grid cell to a position in a sorted table of zone values so that per zone values can be gathered
+        for the whole grid at once.  Integer zones spanning a small range are offset into a dense table directly;
+        all others are factorized.
+
+        :param zones_arr:                   An array containing the lmp zones per grid cell
+        :type zones_arr:                    ndarray
+
+        :param max_table_size:              Largest range of integer zone values to use a dense table for
+        :type max_table_size:               int
+
+        :return:                            [0] Sorted 1D array of zone values in the table
+                                            [1] Array the shape of `zones_arr` holding the table position of each cell
+
+        """
+
+        if np.issubdtype(zones_arr.dtype, np.integer) and zones_arr.size > 0:
+
+            zone_min = int(zones_arr.min())
+            zone_max = int(zones_arr.max())
+
+            if zone_max - zone_min < max_table_size:
+                zone_values = np.arange(zone_min, zone_max + 1)
+                return zone_values, (zones_arr.astype(np.intp) - zone_min)
+
+        zone_values, index_arr = np.unique(zones_arr, return_inverse=True)
+
+        return zone_values, index_arr.reshape(zones_arr.shape)
+
+    @staticmethod
+    def cumulative_lmp(lmp_values):
+        """Sort the hourly LMP of each zone in descending order and accumulate them so that the mean LMP over any
+        window of sorted hours can be calculated in O(zones).  Missing LMP values are sorted last and are not counted.
+
+        :param lmp_values:                  2D array of hourly LMP where [hour, zone]
+        :type lmp_values:                   ndarray
+
+        :return:                            [0] 2D array of the cumulative sum of sorted LMP where [hour + 1, zone]
+                                            [1] 2D array of the cumulative count of sorted LMP where [hour + 1, zone]
+
+        """
+
+        # descending sort that keeps NaN last
+        sorted_lmp = -np.sort(-lmp_values, axis=0)
+
+        valid = ~np.isnan(sorted_lmp)
+
+        lmp_sums = np.zeros((sorted_lmp.shape[0] + 1, sorted_lmp.shape[1]))
+        np.cumsum(np.where(valid, sorted_lmp, 0.0), axis=0, out=lmp_sums[1:])
+
+        lmp_counts = np.zeros(lmp_sums.shape, dtype=np.int64)
+        np.cumsum(valid, axis=0, out=lmp_counts[1:])
+
+        return lmp_sums, lmp_counts
+
     def get_lmp(self):
         """Create LMP array for the current technology.
 
@@ -126,8 +290,6 @@ class LocationalMarginalPricing:
         # number of technologies
         n_technologies = len(self.technology_dict)
 
-        lmp_arr = np.zeros(shape=(n_technologies, self.zones_arr.shape[0], self.zones_arr.shape[1]))
-
         # get the LMP file for the technology from the configuration file
         lmp_file = self.lmp_zone_dict.get('lmp_hourly_data_file', None)
 
@@ -141,28 +303,46 @@ class LocationalMarginalPricing:
         else:
             logging.info(f"Using LMP file:  {lmp_file}")
 
-        lmp_df = pd.read_csv(lmp_file)
+        # table position of each grid cell and the zones present in the grid
+        zone_values, zone_index = self.zone_lookup_index(self.zones_arr)
+        zones_present = zone_values[np.bincount(zone_index.ravel(), minlength=zone_values.shape[0]) > 0]
+        zones_present = zones_present[np.isfinite(zones_present)]
+
+        # only load the zones present in the grid
+        lmp_df = read_lmp_file(lmp_file, zones=zones_present.tolist())
+
+        # sort the hourly LMP of each zone once for all technologies
+        lmp_sums, lmp_counts = self.cumulative_lmp(lmp_df.to_numpy(dtype=np.float64))
+        n_hours = lmp_sums.shape[0] - 1
 
-        # drop the hour field
-        lmp_df.drop('hour', axis=1, inplace=True)
+        # assign the correct LMP window based on the capacity factor of each technology
+        cf_bins = np.array([self.get_cf_bin(self.technology_dict[i]['capacity_factor_fraction'])
+                            for i in self.technology_order], dtype=np.int64).reshape(-1, 2)
+        start_index, through_index = np.minimum(cf_bins, n_hours).T
 
-        for index, i in enumerate(self.technology_order):
+        # mean LMP of each zone over the window of each technology [tech_order, zone]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            zone_lmps = ((lmp_sums[through_index] - lmp_sums[start_index]) /
+                         (lmp_counts[through_index] - lmp_counts[start_index]))
 
-            # assign the correct LMP based on the capacity factor of the technology
-            start_index, through_index = self.get_cf_bin(self.technology_dict[i]['capacity_factor_fraction'])
+        # LMP zones with the no data zone set to NaN
+        nodata_value = self.lmp_zone_dict['lmp_zone_raster_nodata_value']
+        zone_keys = np.array([int(k) for k in lmp_df.columns])
+        has_data = zone_keys != nodata_value
 
-            # sort by descending lmp for each zone
-            for j in lmp_df.columns:
-                lmp_df[j] = lmp_df[j].sort_values(ascending=False).values
+        zone_keys = np.append(zone_keys[has_data], nodata_value)
+        zone_lmps = np.append(zone_lmps[:, has_data], np.full((zone_lmps.shape[0], 1), np.nan), axis=1)
 
-            # create a dictionary of LMP values for each power zone based on tech capacity factor
-            lmp_dict = lmp_df.iloc[start_index:through_index].mean(axis=0).to_dict()
-            lmp_dict = {int(k): lmp_dict[k] for k in lmp_dict.keys()}
+        # table of LMP per zone for each technology where zones without LMP are NaN
+        lmp_table = np.zeros((n_technologies, zone_values.shape[0]))
+        lmp_table[:len(self.technology_order)] = np.nan
 
-            # add in no data
-            lmp_dict[self.lmp_zone_dict['lmp_zone_raster_nodata_value']] = np.nan
+        # place the LMP of each zone present in the grid in the table
+        table_index = np.searchsorted(zone_values, zone_keys)
+        in_table = table_index < zone_values.shape[0]
+        in_table[in_table] = zone_values[table_index[in_table]] == zone_keys[in_table]
 
-            # create LMP array for the current technology
-            lmp_arr[index, :, :] = np.vectorize(lmp_dict.get)(self.zones_arr)
+        lmp_table[:len(self.technology_order), table_index[in_table]] = zone_lmps[:, in_table]
 
-        return lmp_arr
+        # gather the LMP arrays for all technologies at once
+        return np.take(lmp_table.astype(self.dtype), zone_index, axis=1)
@@ -60,8 +60,20 @@ class Model(ReadConfig):
         # siting data to use as the initial condition
         self.initialize_site_data = initialize_site_data
 
-    def stage(self):
-        """run model."""
+    def stage(self, memory_cache=None, target_region_name=None):
+        """Stage data for the target year.
+
+        :param memory_cache:            Dictionary shared across runs to hold staged products in memory keyed by their
+                                        inputs.  Products whose inputs have not changed since a previous run are
+                                        reused instead of recomputed.
+        :type memory_cache:             dict
+
+        :param target_region_name:      Name of a region to stage data for.  Only the bounding box of the region is
+                                        read from each input raster and costs are only calculated over it.  If None,
+                                        data is staged for the full grid space.
+        :type target_region_name:       str
+
+        """
 
         # prepare data for use in siting an expansion per region for a target year
         logging.info('Staging data...')
@@ -75,17 +87,23 @@ class Model(ReadConfig):
                      self.technology_dict,
                      self.technology_order,
                      self.infrastructure_dict,
-                     self.initialize_site_data)
+                     self.initialize_site_data,
+                     memory_cache=memory_cache,
+                     target_region_id=None if target_region_name is None else self.regions_dict.get(target_region_name))
 
         logging.info(f'Staged data in {round((time.time() - staging_t0), 7)} seconds')
 
         return data
 
     def run_single_region(self, target_region_name, write_output=True):
-        """run a single region."""
+        """run a single region.  Only the bounding box of the region is staged unless the `lazy_staging` setting is
+        False."""
 
-        # prepare all data for region level run
-        data = self.stage()
+        # prepare data for the bounding box of the region
+        if self.settings_dict.get('lazy_staging', True):
+            data = self.stage(target_region_name=target_region_name)
+        else:
+            data = self.stage()
 
         process = process_region(target_region_name=target_region_name,
                                  settings_dict=self.settings_dict,
@@ -101,13 +119,13 @@ class Model(ReadConfig):
                                  ic_arr=data.ic_arr,
                                  nlc_arr=data.nlc_arr,
                                  zones_arr=data.zones_arr,
-                                 xcoords=data.xcoords,
-                                 ycoords=data.ycoords,
-                                 indices_2d=data.indices_2d,
+                                 coordinates=data.coordinates,
+                                 grid_index=data.grid_index,
                                  randomize=self.settings_dict.get('randomize', True),
                                  seed_value=self.settings_dict.get('seed_value', 0),
                                  verbose=self.settings_dict.get('verbose', False),
-                                 write_output=write_output)
+                                 write_output=write_output,
+                                 region_extent=data.region_index.get(self.regions_dict.get(target_region_name)))
 
         logging.info(f"CERF model run completed in {round(time.time() - self.start_time, 7)} seconds")
 
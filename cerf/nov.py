@@ -186,15 +186,72 @@ class NetOperationalValue:
 
         return self.unit_size_mw * self.capacity_factor_fraction * self.hours_per_year
 
+    def calc_operating_cost(self):
+        """Calculate the levelized operating cost per unit of generation."""
+
+        term3 = self.variable_om_usd_per_mwh * self.lf_vom
+        term4 = self.heat_rate_btu_per_kWh * (self.fuel_price_usd_per_mmbtu / 1000) * self.lf_fuel
+        term5 = (self.carbon_tax_usd_per_ton * self.fuel_co2_content_tons_per_btu * self.heat_rate_btu_per_kWh * self.lf_carbon / 1000000) * (1 - self.carbon_capture_rate_fraction)
+
+        return term3 + term4 + term5
+
     def calc_nov(self):
         """Calculate NOV array for all technologies."""
 
         generation = self.calc_generation()
         term2 = self.lmp_arr * self.lf_fuel
-        term3 = self.variable_om_usd_per_mwh * self.lf_vom
-        term4 = self.heat_rate_btu_per_kWh * (self.fuel_price_usd_per_mmbtu / 1000) * self.lf_fuel
-        term5 = (self.carbon_tax_usd_per_ton * self.fuel_co2_content_tons_per_btu * self.heat_rate_btu_per_kWh * self.lf_carbon / 1000000) * (1 - self.carbon_capture_rate_fraction)
-        operating_cost = term3 + term4 + term5
+        operating_cost = self.calc_operating_cost()
         nov = generation * (term2 - operating_cost)
 
         return generation, operating_cost, nov
+
+
+def calc_nov_batch(lmp_arr, generation, operating_cost, lf_fuel):
+    """Calculate generation, operating cost, and NOV for all technologies at once.  NOV is computed in place in the
+    output array by broadcasting the per technology parameters so that no full grid temporaries are created.
+
+    :param lmp_arr:                         Locational Marginal Price (LMP) per grid cell for each technology in a
+                                            multi-dimensional array where the shape is [tech_id, xcoord, ycoord].
+                                            Units:  $/MWh
+    :type lmp_arr:                          ndarray
+
+    :param generation:                      Generation per technology in the order of `lmp_arr`.  Technologies in
+                                            `lmp_arr` past the length of the parameters are given zeros.
+                                            Units:  MWh / yr
+    :type generation:                       list
+
+    :param operating_cost:                  Levelized operating cost per technology from
+                                            NetOperationalValue.calc_operating_cost.
+                                            Units:  $/MWh
+    :type operating_cost:                   list
+
+    :param lf_fuel:                         Levelizing factor for fuel per technology.
+    :type lf_fuel:                          list
+
+    :returns:                               [0] generation_mwh_per_year per grid cell
+                                            [1] operating cost per grid cell
+                                            [2] NOV per grid cell
+
+    """
+
+    n_technologies = len(generation)
+
+    # per technology parameters shaped to broadcast over the grid
+    generation = np.asarray(generation, dtype=np.float64).reshape(-1, 1, 1)
+    operating_cost = np.asarray(operating_cost, dtype=np.float64).reshape(-1, 1, 1)
+    lf_fuel = np.asarray(lf_fuel, dtype=np.float64).reshape(-1, 1, 1)
+
+    generation_arr = np.zeros_like(lmp_arr)
+    operating_cost_arr = np.zeros_like(lmp_arr)
+    nov_arr = np.zeros_like(lmp_arr)
+
+    generation_arr[:n_technologies] = generation
+    operating_cost_arr[:n_technologies] = operating_cost
+
+    # NOV = generation * (LMP * lf_fuel - operating cost)
+    nov = nov_arr[:n_technologies]
+    np.multiply(lmp_arr[:n_technologies], lf_fuel, out=nov)
+    np.subtract(nov, operating_cost, out=nov)
+    np.multiply(nov, generation, out=nov)
+
+    return generation_arr, operating_cost_arr, nov_arr
@@ -7,16 +7,20 @@ License:  BSD 2-Clause, see LICENSE and DISCLAIMER files
 
 """
 
+import copy
+import json
 import logging
 import os
 import time
 
+import numpy as np
 import pandas as pd
 from joblib import Parallel, delayed
 
 import cerf.utils as util
 from cerf.model import Model
-from cerf.process_region import process_region
+from cerf.process_region import site_region
+from cerf.read_config import ReadConfig
 
 
 def generate_model(config_file=None, config_dict={}, initialize_site_data=None, log_level='info'):
@@ -50,6 +54,112 @@ def generate_model(config_file=None, config_dict={}, initialize_site_data=None,
     return Model(config_file, config_dict, initialize_site_data, log_level)
 
 
+def load_region_timings(timing_file):
+    """Load the per region processing times recorded by a previous run.
+
+    :param timing_file:                 Full path with file name and extension to the JSON timing file.  If None or
+                                        the file does not exist, no timings are returned.
+    :type timing_file:                  str
+
+    :return:                            Dictionary of {region_name: {'estimate': estimated_cost, 'seconds': seconds}}
+
+    """
+
+    if timing_file is None or not os.path.isfile(timing_file):
+        return {}
+
+    with open(timing_file) as src:
+        return json.load(src)
+
+
+def save_region_timings(timing_file, region_timings):
+    """Write per region processing times to a JSON file so that the next run can refine its schedule.  Timings of
+    regions that were not processed in this run are kept.
+
+    :param timing_file:                 Full path with file name and extension to the JSON timing file
+    :type timing_file:                  str
+
+    :param region_timings:              Dictionary of {region_name: {'estimate': estimated_cost, 'seconds': seconds}}
+    :type region_timings:               dict
+
+    """
+
+    timings = load_region_timings(timing_file)
+    timings.update(region_timings)
+
+    with open(timing_file, 'w') as dest:
+        json.dump(timings, dest, indent=2, sort_keys=True)
+
+
+def schedule_regions(model, data, region_timings=None):
+    """Order the regions to process from the most to the least expected work so that large regions do not start
+    last and hold up the run.  Regions without any sites in the expansion plan are left out.
+
+    The cost of a region is estimated as the number of grid cells in its bounding box times the number of sites
+    requested times the number of technologies.  Where a previous run recorded the processing time of a region, the
+    recorded time scaled by the change in estimated cost is used instead and regions without a recorded time are
+    converted to seconds by the average time per unit of estimated cost.
+
+    :param model:                       Instantiated CERF model class containing configuration options
+    :type model:                        class
+
+    :param data:                        Data from cerf.stage.Stage containing the region index
+
+    :param region_timings:              Dictionary of {region_name: {'estimate': estimated_cost, 'seconds': seconds}}
+                                        from `load_region_timings`
+    :type region_timings:               dict
+
+    :return:                            Dictionary of {region_name: estimated_cost} ordered from the most to the least
+                                        expected work
+
+    """
+
+    if region_timings is None:
+        region_timings = {}
+
+    n_technologies = len(model.technology_order)
+
+    estimates = {}
+    for region_name, region_id in model.regions_dict.items():
+
+        n_sites = sum([i['n_sites'] for i in model.expansion_dict[region_name].values()])
+
+        # regions having no sites in the expansion plan are not dispatched
+        if n_sites <= 0:
+            logging.warning(f"There were no sites expected for any technology in `{region_name}`")
+            continue
+
+        region_extent = data.region_index.get(region_id)
+
+        if region_extent is None:
+            n_cells = 0
+        else:
+            ymin, ymax, xmin, xmax = region_extent['bounds']
+            n_cells = (ymax - ymin) * (xmax - xmin)
+
+        estimates[region_name] = n_cells * n_sites * n_technologies
+
+    # seconds per unit of estimated cost from the regions recorded in a previous run
+    recorded = [region_timings[i] for i in estimates if i in region_timings and region_timings[i]['estimate'] > 0]
+    recorded_estimate = sum([i['estimate'] for i in recorded])
+    seconds_per_unit = sum([i['seconds'] for i in recorded]) / recorded_estimate if recorded_estimate > 0 else 1.0
+
+    expected = {}
+    for region_name, estimate in estimates.items():
+
+        timing = region_timings.get(region_name)
+
+        if timing is not None and timing['estimate'] > 0:
+            expected[region_name] = timing['seconds'] * estimate / timing['estimate']
+        else:
+            expected[region_name] = estimate * seconds_per_unit
+
+    # largest first; the sort is stable so equal regions keep their configured order
+    schedule = sorted(estimates.keys(), key=lambda i: expected[i], reverse=True)
+
+    return {i: estimates[i] for i in schedule}
+
+
 def cerf_parallel(model, data, write_output=True, n_jobs=-1, method='sequential'):
     """Run all regions in parallel.
 
@@ -81,45 +191,64 @@ def cerf_parallel(model, data, write_output=True, n_jobs=-1, method='sequential'
     # start time for parallel run
     t0 = time.time()
 
-    # run all regions in parallel
-    results = Parallel(n_jobs=n_jobs, backend=method)(delayed(process_region)(target_region_name=i,
-                                                                              settings_dict=model.settings_dict,
-                                                                              technology_dict=model.technology_dict,
-                                                                              technology_order=model.technology_order,
-                                                                              expansion_dict=model.expansion_dict,
-                                                                              regions_dict=model.regions_dict,
-                                                                              suitability_arr=data.suitability_arr,
-                                                                              lmp_arr=data.lmp_arr,
-                                                                              generation_arr=data.generation_arr,
-                                                                              operating_cost_arr=data.operating_cost_arr,
-                                                                              nov_arr=data.nov_arr,
-                                                                              ic_arr=data.ic_arr,
-                                                                              nlc_arr=data.nlc_arr,
-                                                                              zones_arr=data.zones_arr,
-                                                                              xcoords=data.xcoords,
-                                                                              ycoords=data.ycoords,
-                                                                              indices_2d=data.indices_2d,
-                                                                              randomize=model.settings_dict.get('randomize', True),
-                                                                              seed_value=model.settings_dict.get('seed_value', 0),
-                                                                              verbose=model.settings_dict.get('verbose', False),
-                                                                              write_output=False) for i in model.regions_dict.keys())
+    # publish the staged arrays once as memory-mapped files so process based workers attach to them by reference
+    #   instead of each receiving a pickled copy
+    if method in ('loky', 'multiprocessing') and data.shared_directory is None:
+        data.share_arrays()
+
+    # dispatch regions from the most to the least expected work
+    timing_file = model.settings_dict.get('region_timing_file')
+    schedule = schedule_regions(model, data, load_region_timings(timing_file))
+
+    # run all regions in parallel; only the sited power plants of each region are returned as it completes
+    results = Parallel(n_jobs=n_jobs, backend=method, return_as='generator_unordered')(
+        delayed(site_region)(target_region_name=i,
+                             settings_dict=model.settings_dict,
+                             technology_dict=model.technology_dict,
+                             technology_order=model.technology_order,
+                             expansion_dict=model.expansion_dict,
+                             regions_dict=model.regions_dict,
+                             suitability_arr=data.suitability_arr,
+                             lmp_arr=data.lmp_arr,
+                             generation_arr=data.generation_arr,
+                             operating_cost_arr=data.operating_cost_arr,
+                             nov_arr=data.nov_arr,
+                             ic_arr=data.ic_arr,
+                             nlc_arr=data.nlc_arr,
+                             zones_arr=data.zones_arr,
+                             coordinates=data.coordinates,
+                             grid_index=data.grid_index,
+                             randomize=model.settings_dict.get('randomize', True),
+                             seed_value=model.settings_dict.get('seed_value', 0),
+                             verbose=model.settings_dict.get('verbose', False),
+                             write_output=False,
+                             region_extent=data.region_index.get(model.regions_dict[i]))
+        for i in schedule.keys())
+
+    region_dfs = {}
+    region_timings = {}
+    for target_region_name, sited_df, processing_seconds in results:
+        region_dfs[target_region_name] = sited_df
+        region_timings[target_region_name] = {'estimate': schedule[target_region_name], 'seconds': processing_seconds}
+
+    # record the processing time of each region to refine the schedule of the next run
+    if timing_file is not None:
+        save_region_timings(timing_file, region_timings)
 
     logging.info(f"All regions processed in {round((time.time() - t0), 7)} seconds.")
     logging.info("Aggregating outputs...")
 
     # create a data frame to hold the outputs
-    df = pd.DataFrame(util.empty_sited_dict()).astype(util.sited_dtypes())
+    frames = [pd.DataFrame(util.empty_sited_dict()).astype(util.sited_dtypes())]
 
     # add in the initialized siting data from a previous years run if so desired
     if model.initialize_site_data is not None:
-        df = pd.concat([df, data.init_df])
+        frames.append(data.init_df)
 
-    # combine the outputs for all regions
-    for i in results:
+    # combine the outputs for all regions in their configured order in a single concatenation
+    frames.extend([region_dfs[i] for i in model.regions_dict.keys() if region_dfs.get(i) is not None])
 
-        # ensure some sites were able to be sited for the target region
-        if i is not None:
-            df = pd.concat([df, i.run_data.sited_df])
+    df = pd.concat(frames)
 
     if write_output:
 
@@ -205,3 +334,178 @@ def run(config_file=None, config_dict={}, write_output=True, n_jobs=-1, method='
         logging.shutdown()
 
     return df
+
+
+def run_pathway(configs_by_year, write_output=True, n_jobs=-1, method='sequential', initialize_site_data=None,
+                log_level='info'):
+    """Run all CERF regions for each year of a multi-year pathway.  Each year is initialized with the sites from
+    the previous year.  Staged data whose inputs do not change between years (e.g., the region index, LMP zones,
+    interconnection costs, and base suitability) is held in memory and reused instead of being rebuilt.  Products
+    that depend on the run year are not held and products not used by a year are released before the next.
+
+    :param configs_by_year:             Dictionary of {run_year: config} where config is either the full path with
+                                        file name and extension to the input config.yml file or a configuration
+                                        dictionary for the year.  Years are run in ascending order.
+    :type configs_by_year:              dict
+
+    :param write_output:                Write output as a raster to the output directory specified in the config file
+    :type write_output:                 bool
+
+    :param n_jobs:                      The number of processors to utilize.  Default is -1 which is all but 1.
+    :type n_jobs:                       int
+
+    :param method:                      Backend parallelization method used in Joblib.  Default is sequential to
+                                        manage overhead for local runs.  Options for advanced configurations are:
+                                        loky, threading, and multiprocessing.
+                                        See https://joblib.readthedocs.io/en/latest/parallel.html for details.
+    :type method:                       str
+
+    :param initialize_site_data:        None if no initialization is required for the first year, otherwise either a
+                                        CSV file or Pandas DataFrame of siting data.  See `run` for the required
+                                        fields.
+
+    :param log_level:                   Log level.  Options are 'info' and 'debug'.  Default 'info'
+    :type log_level:                    str
+
+    :return:                            Dictionary of {run_year: data frame containing each sited power plant and
+                                        their attributes}
+
+    """
+
+    # staged products shared across years
+    memory_cache = {}
+
+    results = {}
+    for run_year in sorted(configs_by_year.keys()):
+
+        config = configs_by_year[run_year]
+
+        try:
+
+            # instantiate CERF model for the target year
+            if isinstance(config, dict):
+                model = generate_model(config_dict=config,
+                                       initialize_site_data=initialize_site_data,
+                                       log_level=log_level.lower())
+            else:
+                model = generate_model(config_file=config,
+                                       initialize_site_data=initialize_site_data,
+                                       log_level=log_level.lower())
+
+            if model.settings_dict.get('run_year') != run_year:
+                msg = f"The 'run_year' in the configuration for {run_year} is {model.settings_dict.get('run_year')}"
+                logging.error(msg)
+                raise ValueError(msg)
+
+            # process supporting data reusing what is unchanged from previous years
+            data = model.stage(memory_cache=memory_cache)
+
+            # only keep the products used by this year in memory for the next
+            data.release_memory_cache()
+
+            df = cerf_parallel(model=model,
+                               data=data,
+                               write_output=write_output,
+                               n_jobs=n_jobs,
+                               method=method)
+
+            # release the staged data of this year before staging the next
+            del data
+
+            logging.info(f"CERF model run for {run_year} completed in {round(time.time() - model.start_time, 7)} seconds")
+
+        finally:
+            # remove logging handlers
+            logger = logging.getLogger()
+
+            for handler in logger.handlers[:]:
+                handler.close()
+                logger.removeHandler(handler)
+
+            logging.shutdown()
+
+        results[run_year] = df
+
+        # sites for the current year become the initial condition for the next year
+        initialize_site_data = df
+
+    return results
+
+
+def validate_precision(config_file=None, config_dict={}, precision='float32', n_jobs=-1, method='sequential',
+                       initialize_site_data=None, log_level='info'):
+    """Report how much sited outcomes differ when data is staged in reduced precision instead of float64.  Both runs
+    are made with `randomize` set to False so that differences are due to precision alone.
+
+    :param config_file:                 Full path with file name and extension to the input config.yml file
+    :type config_file:                  str
+
+    :param config_dict:                 Optional instead of config_file. Configuration dictionary.
+    :type config_dict:                  dict
+
+    :param precision:                   Precision to compare against float64.  Default 'float32'.
+    :type precision:                    str
+
+    :param n_jobs:                      The number of processors to utilize.  Default is -1 which is all but 1.
+    :type n_jobs:                       int
+
+    :param method:                      Backend parallelization method used in Joblib.  Default is sequential to
+                                        manage overhead for local runs.  Options for advanced configurations are:
+                                        loky, threading, and multiprocessing.
+                                        See https://joblib.readthedocs.io/en/latest/parallel.html for details.
+    :type method:                       str
+
+    :param initialize_site_data:        None if no initialization is required, otherwise either a CSV file or
+                                        Pandas DataFrame of siting data.  See `run` for the required fields.
+
+    :param log_level:                   Log level.  Options are 'info' and 'debug'.  Default 'info'
+    :type log_level:                    str
+
+    :return:                            A data frame per technology of the number of sites in each run, the number
+                                        sited at the same grid cell in both, the fraction of float64 sites matched,
+                                        and the largest absolute difference in NLC of matched sites.  Only sites of
+                                        the run year are counted; initialized sites are not.
+
+    """
+
+    outputs = {}
+    for run_precision in ('float64', precision):
+
+        # override the precision and disable random tie breaking for the run
+        run_config = copy.deepcopy(config_dict)
+        run_settings = run_config.setdefault('settings', {})
+        run_settings['precision'] = run_precision
+        run_settings['randomize'] = False
+
+        outputs[run_precision] = run(config_file=config_file,
+                                     config_dict=run_config,
+                                     write_output=False,
+                                     n_jobs=n_jobs,
+                                     method=method,
+                                     initialize_site_data=initialize_site_data,
+                                     log_level=log_level)
+
+    # only compare the sites of the run year; initialized sites are carried into both runs unchanged
+    run_year = ReadConfig(config_file, copy.deepcopy(config_dict)).settings_dict.get('run_year')
+
+    reference_df = outputs['float64'].loc[outputs['float64']['sited_year'] == run_year]
+    precision_df = outputs[precision].loc[outputs[precision]['sited_year'] == run_year]
+
+    # sites of the same technology in the same grid cell in both runs; a grid cell is only sited once per run
+    matched_df = reference_df.merge(precision_df,
+                                    on=['tech_id', 'index'],
+                                    suffixes=('_float64', f'_{precision}'),
+                                    validate='one_to_one')
+    matched_df['nlc_difference'] = (matched_df['net_locational_cost_usd_per_year_float64'] -
+                                    matched_df[f'net_locational_cost_usd_per_year_{precision}']).abs()
+
+    summary_df = pd.DataFrame({'n_sites_float64': reference_df.groupby('tech_id').size(),
+                               f'n_sites_{precision}': precision_df.groupby('tech_id').size(),
+                               'n_sites_matched': matched_df.groupby('tech_id').size()}).fillna(0).astype(np.int64)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        summary_df['fraction_matched'] = summary_df['n_sites_matched'] / summary_df['n_sites_float64']
+
+    summary_df['max_abs_nlc_difference'] = matched_df.groupby('tech_id')['nlc_difference'].max()
+
+    return summary_df.rename_axis('tech_id').reset_index()
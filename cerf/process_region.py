@@ -12,10 +12,10 @@ import os
 import time
 
 import numpy as np
-import pandas as pd
 import rasterio
 
 import cerf.package_data as pkg
+import cerf.utils as util
 from cerf.compete import Competition
 
 
@@ -35,14 +35,14 @@ class ProcessRegion:
                  ic_arr,
                  nlc_arr,
                  zones_arr,
-                 xcoords,
-                 ycoords,
-                 indices_2d,
+                 coordinates,
+                 grid_index,
                  target_region_name,
                  randomize=True,
                  seed_value=0,
                  verbose=False,
-                 write_output=False):
+                 write_output=False,
+                 region_extent=None):
 
         # dictionary containing project level settings
         self.settings_dict = settings_dict
@@ -65,6 +65,12 @@ class ProcessRegion:
         # the id of the target region as it is represented in the region raster
         self.target_region_id = self.get_region_id()
 
+        # bounding box and in-region mask of the target region
+        self.region_extent = region_extent
+
+        # width and height of a grid cell in meters used to size the siting buffers
+        self.cell_size = self.get_cell_size()
+
         # suitability data for the CONUS
         self.suitability_arr = suitability_arr
 
@@ -89,9 +95,8 @@ class ProcessRegion:
         # lmp zoness for the CONUS
         self.zones_arr = zones_arr
 
-        # coordinates for each index
-        self.xcoords = xcoords
-        self.ycoords = ycoords
+        # coordinates of grid cells computed from their grid index
+        self.coordinates = coordinates
 
         # the choice to randomize when a technology has more than one NLC cheapest value
         self.randomize = randomize
@@ -112,12 +117,9 @@ class ProcessRegion:
         self.suitable_nlc_region = self.mask_nlc()
 
         logging.debug(f"Generating grid indices for {self.target_region_name}")
-        # grid indices for the entire grid in a 2D array
-        self.indices_2d = indices_2d
-        self.indices_flat_region = self.get_grid_indices()
-
-        logging.debug(f"Get grid coordinates for {self.target_region_name}")
-        self.xcoords_region, self.ycoords_region = self.get_grid_coordinates()
+        # conversion from positions in the staged grid to indices of the full grid space
+        self.grid_index = grid_index
+        self.region_grid_index = self.get_grid_indices()
 
         logging.debug(f"Extracting additional metrics for {self.target_region_name}")
         self.lmp_flat_dict, self.generation_flat_dict, self.operating_cost_flat_dict, self.nov_flat_dict, self.ic_flat_dict = self.extract_region_metrics()
@@ -143,70 +145,62 @@ class ProcessRegion:
 
             raise KeyError()
 
-    def extract_region_suitability(self):
-        """Extract a single region from the suitability."""
+    def get_cell_size(self):
+        """Get the (width, height) of a grid cell from the region raster."""
 
-        # load the region raster as array
-        region_raster_file = self.settings_dict.get('region_raster_file')
+        with rasterio.open(self.settings_dict.get('region_raster_file')) as src:
+            return src.res
 
-        with rasterio.open(region_raster_file) as src:
-            regions_arr = src.read(1)
+    def extract_region_suitability(self):
+        """Extract a single region from the suitability."""
 
-        # get target region indices in grid space
-        region_indices = np.where(regions_arr == self.target_region_id)
+        # index the target region from the region raster if it has not been provided from staging
+        if self.region_extent is None:
+            region_raster_file = self.settings_dict.get('region_raster_file')
+            self.region_extent = util.build_region_index(region_raster_file, [self.target_region_id])[self.target_region_id]
 
         # get minimum and maximum bounds
-        ymin = np.min(region_indices[0])
-        ymax = np.max(region_indices[0]) + 1
-        xmin = np.min(region_indices[1])
-        xmax = np.max(region_indices[1]) + 1
-
-        # extract region and give binary designation
-        region_mask = regions_arr[ymin:ymax, xmin:xmax].copy()
-        region_mask = np.where(region_mask == self.target_region_id, 0, 1)
+        ymin, ymax, xmin, xmax = self.region_extent['bounds']
 
-        # extract region footprint from suitability data
-        suitability_array_region = self.suitability_arr[:, ymin:ymax, xmin:xmax].copy()
-
-        # add in suitability where unsuitable is the highest value of NLC
-        suitability_array_region += region_mask
-
-        # at this point, we have all suitable grid cells as 0 and all not as 1
-        suitability_array_region = np.where(suitability_array_region == 0, 0, 1)
+        # boolean mask where unsuitable is True with a leading default dimension
+        n_technologies = self.suitability_arr.shape[0]
+        suitability_array_region = np.empty((n_technologies + 1, ymax - ymin, xmax - xmin), dtype=bool)
 
         # exclude all area for the default dimension
-        suitability_array_region = np.insert(suitability_array_region, 0, np.ones_like(suitability_array_region[0, :, :]), axis=0)
+        suitability_array_region[0, :, :] = True
+
+        # any non-zero suitability or grid cell outside of the region is unsuitable
+        np.logical_or(self.suitability_arr[:, ymin:ymax, xmin:xmax],
+                      ~self.region_extent['mask'],
+                      out=suitability_array_region[1:, :, :])
 
         return suitability_array_region, ymin, ymax, xmin, xmax
 
     def mask_nlc(self):
-        """Extract NLC elements for the current region."""
+        """Extract NLC elements for the current region where grid cells that are unsuitable for a technology are +inf
+        so they can never be the cheapest option."""
 
-        # extract region footprint from NLC data
-        nlc_arr_region = self.nlc_arr[:, self.ymin:self.ymax, self.xmin:self.xmax].copy()
+        # zero array as index [0, :, :], excluded so the tech_id 0 will always be min if nothing is left to site
+        n_technologies = self.nlc_arr.shape[0]
+        nlc_arr_region = np.zeros((n_technologies + 1, self.ymax - self.ymin, self.xmax - self.xmin),
+                                  dtype=self.nlc_arr.dtype)
 
-        # insert zero array, mask it as index [0, :, :] so the tech_id 0 will always be min if nothing is left to site
-        nlc_arr_region = np.insert(nlc_arr_region, 0, np.zeros_like(nlc_arr_region[0, :, :]), axis=0)
+        # extract region footprint from NLC data
+        nlc_arr_region[1:, :, :] = self.nlc_arr[:, self.ymin:self.ymax, self.xmin:self.xmax]
 
         # make any nan grid cells the most expensive option to exclude
-        nlc_arr_region = np.nan_to_num(nlc_arr_region, nan=np.nanmax(nlc_arr_region) + 1)
-
-        # apply the mask to NLC data
-        return np.ma.masked_array(nlc_arr_region, mask=self.suitability_array_region)
-
-    def get_grid_indices(self):
-        """Generate a 1D array of grid indices the target region to use as a way to map region level outcomes back to the
-        full grid space."""
+        np.nan_to_num(nlc_arr_region, copy=False, nan=np.nanmax(nlc_arr_region) + 1)
 
-        return self.indices_2d[self.ymin:self.ymax, self.xmin:self.xmax].flatten()
+        # exclude unsuitable grid cells in place
+        nlc_arr_region[self.suitability_array_region] = np.inf
 
-    def get_grid_coordinates(self):
-        """Generate 1D arrays of grid coordinates (X, Y) to use for siting based on the bounds of the target region."""
+        return nlc_arr_region
 
-        xcoord_2d_region = self.xcoords[self.ymin:self.ymax, self.xmin:self.xmax].flatten()
-        ycoord_2d_region = self.ycoords[self.ymin:self.ymax, self.xmin:self.xmax].flatten()
+    def get_grid_indices(self):
+        """Get the index of the bounding box of the target region to use as a way to map region level outcomes back to
+        the full grid space."""
 
-        return xcoord_2d_region, ycoord_2d_region
+        return self.grid_index.window((self.ymin, self.ymax, self.xmin, self.xmax))
 
     def extract_region_metrics(self):
         """Extract the LMP, NOV, and IC arrays for the target region and return them as dictionaries where
@@ -250,15 +244,18 @@ class ProcessRegion:
                            ic_dict=self.ic_flat_dict,
                            nlc_mask=self.suitable_nlc_region,
                            zones_arr=self.zones_flat_arr,
-                           xcoords=self.xcoords_region,
-                           ycoords=self.ycoords_region,
-                           indices_flat=self.indices_flat_region,
+                           xcoords=None,
+                           ycoords=None,
+                           indices_flat=None,
                            randomize=self.randomize,
                            seed_value=self.seed_value,
-                           verbose=self.verbose)
+                           verbose=self.verbose,
+                           cell_size=self.cell_size,
+                           coordinates=self.coordinates,
+                           grid_index=self.region_grid_index)
 
-        # create data frame of sited data
-        df = pd.DataFrame(comp.sited_dict)
+        # data frame of sited data
+        df = comp.sited_df
 
         # write outputs if so desired
         if self.write_outputs:
@@ -286,13 +283,13 @@ def process_region(target_region_name,
                    ic_arr,
                    nlc_arr,
                    zones_arr,
-                   xcoords,
-                   ycoords,
-                   indices_2d,
+                   coordinates,
+                   grid_index,
                    randomize=True,
                    seed_value=0,
                    verbose=False,
-                   write_output=True):
+                   write_output=True,
+                   region_extent=None):
     """Convenience wrapper to log time and site an expansion plan for a target region for the target year.
 
     :param target_region_name:                   Name of the target region as it is represented in the region raster.
@@ -314,12 +311,20 @@ def process_region(target_region_name,
     :param regions_dict:                         Mapping from region name to region ID from cerf.read_config.ReadConfig
     :type regions_dict:                          dict
 
-    :param suitability_arr:                     3D array where {tech_id, x, y} for suitability data
+    :param suitability_arr:                     3D boolean array where {tech_id, x, y} for suitability data where
+                                                unsuitable grid cells are True
     :type suitability_arr:                      ndarray
 
     :param nlc_arr:                             3D array where {tech_id, x, y} for NLC data
     :type nlc_arr:                              ndarray
 
+    :param coordinates:                         Coordinates of grid cells by grid index from cerf.grid.GridCoordinates
+    :type coordinates:                          class
+
+    :param grid_index:                          Conversion from positions in the staged grid to indices of the full
+                                                grid space from cerf.grid.GridIndex
+    :type grid_index:                           class
+
     :param data:                                Object containing all data (NLC, etc.) to run the expansion. This
                                                 data is generated from the cerf.stage.Stage class.
     :type data:                                 class
@@ -338,6 +343,11 @@ def process_region(target_region_name,
     :param write_output:                        Choice to write output to a file
     :type write_output:                         bool
 
+    :param region_extent:                       Dictionary of {'bounds': (ymin, ymax, xmin, xmax), 'mask': 2D boolean
+                                                array} for the target region from cerf.utils.build_region_index.  If
+                                                None, the target region is indexed from the region raster.
+    :type region_extent:                        dict
+
     :return:                                    2D NumPy array of sited technologies in the CONUS grid space where
                                                 grid cell values are in the technology number as provided by the
                                                 expansion plan
@@ -373,15 +383,42 @@ def process_region(target_region_name,
                                 ic_arr=ic_arr,
                                 nlc_arr=nlc_arr,
                                 zones_arr=zones_arr,
-                                xcoords=xcoords,
-                                ycoords=ycoords,
-                                indices_2d=indices_2d,
+                                coordinates=coordinates,
+                                grid_index=grid_index,
                                 target_region_name=target_region_name,
                                 randomize=randomize,
                                 seed_value=seed_value,
                                 verbose=verbose,
-                                write_output=write_output)
+                                write_output=write_output,
+                                region_extent=region_extent)
 
-        logging.info(f'Processed `{target_region_name}` in {round(time.time() - region_t0, 7)} seconds')
+        # time spent processing the region used to schedule regions in later runs
+        process.processing_seconds = time.time() - region_t0
+
+        logging.info(f'Processed `{target_region_name}` in {round(process.processing_seconds, 7)} seconds')
 
         return process
+
+
+def site_region(target_region_name, **kwargs):
+    """Site an expansion plan for a target region and return only the sited power plants so that the region level
+    arrays held by `ProcessRegion` are released as soon as the region is finished.
+
+    :param target_region_name:                  Name of the target region as it is represented in the region raster
+    :type target_region_name:                   str
+
+    :param kwargs:                              Keyword arguments passed to `process_region`
+
+    :return:                                    [0] name of the target region
+                                                [1] data frame of sited power plants, or None if the region had no
+                                                    sites in the expansion plan
+                                                [2] seconds spent processing the region
+
+    """
+
+    process = process_region(target_region_name=target_region_name, **kwargs)
+
+    if process is None:
+        return target_region_name, None, 0.0
+
+    return target_region_name, process.run_data.sited_df, process.processing_seconds
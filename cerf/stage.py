@@ -8,20 +8,33 @@ License:  BSD 2-Clause, see LICENSE and DISCLAIMER files
 """
 
 import logging
+import os
+import shutil
+import tempfile
+import weakref
 
 import numpy as np
 import pkg_resources
-import rasterio
+import yaml
 
 import cerf.utils as util
 import cerf.package_data as pkg
+from cerf.cache import StagingCache, cache_key, dataset_files
+from cerf.grid import GridCoordinates, GridIndex
 from cerf.lmp import LocationalMarginalPricing
-from cerf.nov import NetOperationalValue
+from cerf.nov import NetOperationalValue, calc_nov_batch
 from cerf.interconnect import Interconnection
 
 
 class Stage:
 
+    # floating point precisions that data can be staged in
+    PRECISIONS = ('float64', 'float32')
+
+    # staged arrays that can be shared with parallel workers through memory-mapped files
+    SHARED_ARRAYS = ('suitability_arr', 'lmp_arr', 'generation_arr', 'operating_cost_arr', 'nov_arr', 'ic_arr',
+                     'nlc_arr', 'zones_arr')
+
     # type hints
     settings_dict: dict
     lmp_zone_dict: dict
@@ -29,7 +42,7 @@ class Stage:
     technology_order: list
 
     def __init__(self, settings_dict, lmp_zone_dict, technology_dict, technology_order, infrastructure_dict,
-                 initialize_site_data):
+                 initialize_site_data, memory_cache=None, target_region_id=None):
 
         # dictionary containing project level settings
         self.settings_dict = settings_dict
@@ -49,34 +62,76 @@ class Stage:
         # initialize model with existing site data
         self.initialize_site_data = initialize_site_data
 
+        # directory holding memory-mapped copies of the staged arrays if they have been shared
+        self.shared_directory = None
+
+        # persistent cache of staged arrays keyed by the inputs they are built from
+        cache_directory = self.settings_dict.get('staging_cache_directory', None)
+        self.cache = None if cache_directory is None else StagingCache(cache_directory)
+
+        # dictionary shared across Stage instances holding staged products in memory keyed by their inputs
+        self.memory_cache = memory_cache
+
+        # keys of the in-memory cache used by this instance
+        self.memory_cache_keys = set()
+
+        # floating point precision to stage cubes in
+        self.precision = self.get_precision()
+
         # tech_id to tech_name dictionary
         self.tech_name_dict = ({k: self.technology_dict[k].get('tech_name') for k in self.technology_dict.keys()})
 
-        # load coordinate data
+        # region to stage data for; if None, data is staged for the full grid space
+        self.target_region_id = target_region_id
+        self.region_ids = self.get_region_ids()
+
+        # bounding box and in-region mask for each region
         self.cerf_regionid_raster_file = self.settings_dict.get('region_raster_file')
-        self.xcoords, self.ycoords = util.raster_to_coord_arrays(self.cerf_regionid_raster_file)
+        self.region_index = self.cached('region_index',
+                                        ('region_index', self.cerf_regionid_raster_file, self.region_ids),
+                                        lambda: util.build_region_index(self.cerf_regionid_raster_file,
+                                                                        self.region_ids),
+                                        persist=False)
+
+        # coordinates of grid cells computed from their index in the full grid space
+        self.coordinates = GridCoordinates.from_raster(self.cerf_regionid_raster_file)
+
+        # (height, width) of the full grid space
+        self.grid_shape = self.coordinates.shape
+
+        # bounding box of the target region to read all inputs for; None reads the full grid space
+        self.window = self.get_window()
 
-        # generate grid indices in a flat array
-        self.indices_flat = np.array(np.arange(self.xcoords.flatten().shape[0]))
-        self.indices_2d = self.indices_flat.reshape(self.xcoords.shape)
+        # conversion from positions in the staged grid to indices of the full grid space
+        self.grid_index = GridIndex(self.grid_shape, self.window)
 
         # initialization data for siting
         self.init_arr, self.init_df = self.get_sited_data()
 
         # raster file containing the lmp zones per grid cell
-        self.zones_arr = self.load_lmp_zone_raster()
+        self.zones_arr = self.cached('zones_arr',
+                                     ('zones_arr', self.lmp_zone_dict.get('lmp_zone_raster_file', None), self.window),
+                                     self.load_lmp_zone_raster)
 
         # get LMP array per tech [tech_order, x, y]
         logging.info('Processing locational marginal pricing (LMP)')
-        self.lmp_arr = self.calculate_lmp()
+        self.lmp_arr = self.cached('lmp_arr', ('lmp_arr',) + self.lmp_cache_inputs(), self.calculate_lmp)
 
         # get interconnection cost per tech [tech_order, x, y]
         logging.info('Calculating interconnection costs (IC)')
-        self.ic_arr = self.calculate_ic()
+        if self.writes_ic_outputs():
+            self.ic_arr = self.calculate_ic()
+        else:
+            self.ic_arr = self.cached('ic_arr', ('ic_arr',) + self.ic_cache_inputs(), self.calculate_ic)
 
         # get NOV array per tech [tech_order, x, y]
         logging.info('Calculating net operational cost (NOV)')
-        self.generation_arr, self.operating_cost_arr, self.nov_arr = self.calculate_nov()
+        self.generation_arr, self.operating_cost_arr, self.nov_arr = self.cached(('generation_arr',
+                                                                                  'operating_cost_arr',
+                                                                                  'nov_arr'),
+                                                                                 ('nov_arr',) + self.nov_cache_inputs(),
+                                                                                 self.calculate_nov,
+                                                                                 memory=False)
 
         # get NLC array per tech [tech_order, x, y]
         logging.info('Calculating net locational cost (NLC)')
@@ -86,6 +141,162 @@ class Stage:
         logging.info('Building suitability array')
         self.suitability_arr = self.build_suitability_array()
 
+    def cached(self, names, inputs, func, persist=True, memory=True):
+        """Get staged products from the in-memory cache if one has been passed, then from the staging cache if one has
+        been configured using the `staging_cache_directory` setting, otherwise compute them.
+
+        :param names:                   Name of the staged array or a tuple of names if `func` returns a tuple
+        :type names:                    str, tuple
+
+        :param inputs:                  Tuple of the inputs that determine the staged array(s)
+        :type inputs:                   tuple
+
+        :param func:                    Function with no arguments that computes the staged array(s)
+        :type func:                     function
+
+        :param persist:                 If False, the product is only held in memory and never written to the staging
+                                        cache.  Used for products that are not arrays.
+        :type persist:                  bool
+
+        :param memory:                  If False, the product is never held in the in-memory cache.  Used for products
+                                        that depend on the run year and so cannot be reused by another year.
+        :type memory:                   bool
+
+        """
+
+        memory_cache = self.memory_cache if memory else None
+
+        if self.cache is None and memory_cache is None:
+            return func()
+
+        key = cache_key(*inputs)
+
+        if memory_cache is not None:
+            self.memory_cache_keys.add(key)
+
+            if key in memory_cache:
+                return memory_cache[key]
+
+        if self.cache is not None and persist:
+            result = self.cache.get_or_compute(names, key, func)
+        else:
+            result = func()
+
+        if memory_cache is not None:
+            memory_cache[key] = result
+
+        return result
+
+    def release_memory_cache(self):
+        """Remove the products from the in-memory cache that were not used by this instance so that products of
+        inputs that have since changed are not held for the rest of a multi-year run.
+
+        """
+
+        if self.memory_cache is None:
+            return
+
+        for key in set(self.memory_cache) - self.memory_cache_keys:
+            del self.memory_cache[key]
+
+    def get_precision(self):
+        """Get the floating point data type to stage cubes in from the `precision` setting."""
+
+        precision = self.settings_dict.get('precision', 'float64')
+
+        if precision not in self.PRECISIONS:
+            msg = f"The 'precision' setting '{precision}' must be one of:  {self.PRECISIONS}"
+            logging.error(msg)
+            raise ValueError(msg)
+
+        return np.dtype(precision)
+
+    def get_region_ids(self):
+        """Get the region IDs to index from the target region or the configured region name to ID file so that values
+        in the region raster that are not configured regions, such as nodata, are never indexed as regions.  If
+        neither is available, None is returned and all positive region IDs in the raster are indexed.
+
+        """
+
+        if self.target_region_id is not None:
+            return [self.target_region_id]
+
+        region_name_to_id_file = self.settings_dict.get('region_name_to_id_file', None)
+
+        if region_name_to_id_file is None:
+            return None
+
+        with open(region_name_to_id_file, 'r') as yml:
+            regions_dict = yaml.load(yml, Loader=yaml.FullLoader)
+
+        return sorted(regions_dict.values())
+
+    def get_window(self):
+        """Get the bounding box of the target region as (ymin, ymax, xmin, xmax) grid cell positions and rebase the
+        region index to it.  If there is no target region, None is returned and the full grid space is staged.
+
+        """
+
+        if self.target_region_id is None:
+            return None
+
+        region_extent = self.region_index.get(self.target_region_id)
+
+        if region_extent is None:
+            msg = f"Region ID {self.target_region_id} is not in the region raster:  {self.cerf_regionid_raster_file}"
+            logging.error(msg)
+            raise ValueError(msg)
+
+        ymin, ymax, xmin, xmax = region_extent['bounds']
+
+        logging.info(f"Staging data for the bounding box of region ID {self.target_region_id}:  {region_extent['bounds']}")
+
+        # the region now spans the full staged grid; a new dictionary keeps the in-memory cache intact
+        self.region_index = {self.target_region_id: {'bounds': (0, ymax - ymin, 0, xmax - xmin),
+                                                     'mask': region_extent['mask']}}
+
+        return ymin, ymax, xmin, xmax
+
+    def lmp_cache_inputs(self):
+        """Inputs that determine the LMP array."""
+
+        capacity_factors = [self.technology_dict[i]['capacity_factor_fraction'] for i in self.technology_order]
+
+        return self.lmp_zone_dict, capacity_factors, self.precision.name, self.window
+
+    def ic_cache_inputs(self):
+        """Inputs that determine the interconnection cost array."""
+
+        region_files = [self.settings_dict.get(i) for i in ('region_raster_file',
+                                                            'region_abbrev_to_name_file',
+                                                            'region_name_to_id_file')]
+
+        # only the technology parameters used in the interconnection costs
+        tech_params = [[self.technology_dict[i].get(j) for j in ('require_pipelines', 'discount_rate', 'lifetime_yrs')]
+                       for i in self.technology_order]
+
+        # key shapefiles by all of their component files so that edits to attributes such as voltages are detected
+        infrastructure = dict(self.infrastructure_dict)
+        for i in ('substation_file', 'pipeline_file'):
+            infrastructure[i] = dataset_files(infrastructure.get(i, None))
+
+        return (infrastructure, region_files, self.lmp_zone_dict.get('lmp_zone_raster_file', None),
+                tech_params, self.precision.name, self.window)
+
+    def writes_ic_outputs(self):
+        """Interconnection outputs are written while calculating the interconnection costs so they cannot be cached."""
+
+        return any(self.infrastructure_dict.get(i, False) for i in ('output_rasterized_file',
+                                                                    'output_alloc_file',
+                                                                    'output_cost_file',
+                                                                    'output_dist_file'))
+
+    def nov_cache_inputs(self):
+        """Inputs that determine the generation, operating cost, and NOV arrays."""
+
+        return self.lmp_cache_inputs() + (self.technology_dict, self.technology_order,
+                                          self.settings_dict.get('run_year'))
+
     def load_lmp_zone_raster(self):
         """Load the lmp zoness raster for the CONUS into a 2D array."""
 
@@ -98,9 +309,8 @@ class Stage:
 
         logging.info(f"Using 'zones_raster_file':  {zones_raster_file}")
 
-        # read in lmp zoness raster as a 2D numpy array
-        with rasterio.open(zones_raster_file) as src:
-            return src.read(1)
+        # read in lmp zoness raster for the staged grid as a 2D numpy array
+        return util.read_raster(zones_raster_file, bounds=self.window)
 
     def calculate_lmp(self):
         """Calculate Locational Marginal Pricing."""
@@ -109,7 +319,8 @@ class Stage:
         pricing = LocationalMarginalPricing(self.lmp_zone_dict,
                                             self.technology_dict,
                                             self.technology_order,
-                                            self.zones_arr)
+                                            self.zones_arr,
+                                            dtype=self.precision)
         lmp_arr = pricing.get_lmp()
 
         # get lmp array per tech [tech_order, x, y]
@@ -145,7 +356,9 @@ class Stage:
                              output_alloc_file=output_alloc_file,
                              output_cost_file=output_cost_file,
                              interconnection_cost_file=interconnection_cost_file,
-                             output_dir=self.settings_dict.get('output_directory', None))
+                             output_dir=self.settings_dict.get('output_directory', None),
+                             cache_directory=self.settings_dict.get('staging_cache_directory', None),
+                             window=self.window)
 
         ic_arr = ic.generate_interconnection_costs_array()
 
@@ -154,9 +367,10 @@ class Stage:
     def calculate_nov(self):
         """Calculate Net Operational Value."""
 
-        nov_arr = np.zeros_like(self.lmp_arr)
-        generation_arr = np.zeros_like(self.lmp_arr)
-        operating_cost_arr = np.zeros_like(self.lmp_arr)
+        # per technology generation, operating cost, and levelizing factor for fuel
+        generation = []
+        operating_cost = []
+        lf_fuel = []
 
         for index, i in enumerate(self.technology_order):
             econ = NetOperationalValue(discount_rate=self.technology_dict[i]['discount_rate'],
@@ -175,13 +389,12 @@ class Stage:
                                        lmp_arr=self.lmp_arr[index, :, :],
                                        target_year=self.settings_dict.get('run_year'))
 
-            generation_tech_arr, operating_cost_tech_arr, nov_tech_arr = econ.calc_nov()
+            generation.append(econ.calc_generation())
+            operating_cost.append(econ.calc_operating_cost())
+            lf_fuel.append(econ.lf_fuel)
 
-            nov_arr[index, :, :] = nov_tech_arr
-            generation_arr[index, :, :] = generation_tech_arr
-            operating_cost_arr[index, :, :] = operating_cost_tech_arr
-
-        return generation_arr, operating_cost_arr, nov_arr
+        # calculate the grids for all technologies at once
+        return calc_nov_batch(self.lmp_arr, generation, operating_cost, lf_fuel)
 
     def calculate_nlc(self):
         """Calculate Net Locational Costs."""
@@ -201,26 +414,29 @@ class Stage:
 
             # load siting data into a 2D array for the full grid space
             logging.info("Initializing previous siting data")
+
+            # sites are located in the full grid space so that buffers of sites outside of the window are kept
             init_arr, init_df = util.ingest_sited_data(run_year=self.settings_dict['run_year'],
-                                                       x_array=self.xcoords,
+                                                       x_array=None,
                                                        siting_data=self.initialize_site_data,
-                                                       template_raster_file=self.settings_dict.get('region_raster_file'))
-            return init_arr, init_df
+                                                       template_raster_file=self.settings_dict.get('region_raster_file'),
+                                                       buffer_shape=self.settings_dict.get('buffer_shape', 'square'))
+
+            rows, cols = util.window_slices(self.window)
+
+            return init_arr[rows, cols], init_df
 
         else:
             return None, None
 
-    def build_suitability_array(self):
-        """Build suitability array for all technologies."""
+    def suitability_raster_files(self):
+        """Get the suitability raster file for each technology in processing order."""
 
         # fetch the default suitability dictionary
         default_suitability_file_dict = util.default_suitabiity_files()
 
-        # set up holder for suitability array
-        suitability_array = np.ones_like(self.nlc_arr)
-
-        # load tech specific rasters
-        for index, i in enumerate(self.technology_order):
+        raster_files = []
+        for i in self.technology_order:
 
             # path to the input raster
             tech_suitability_raster_file = self.technology_dict[i].get('suitability_raster_file', None)
@@ -229,18 +445,71 @@ class Stage:
                 default_raster = default_suitability_file_dict[self.tech_name_dict[i]]
                 tech_suitability_raster_file = pkg.get_suitability_raster(default_raster)
 
-            logging.info(f"Using suitability file for '{self.technology_dict[i]['tech_name']}':  {tech_suitability_raster_file}")
+            raster_files.append(tech_suitability_raster_file)
+
+        return raster_files
 
-            # load raster to array
-            with rasterio.open(tech_suitability_raster_file) as src:
+    def load_suitability_rasters(self, raster_files):
+        """Load the suitability raster for each technology into a boolean array where any non-zero value is
+        unsuitable (True).
 
-                # read to 2D array
-                tech_arr = src.read(1)
+        """
+
+        # set up holder for suitability array
+        suitability_array = np.ones(self.nlc_arr.shape, dtype=bool)
+
+        # load tech specific rasters
+        for index, i in enumerate(self.technology_order):
+
+            logging.info(f"Using suitability file for '{self.technology_dict[i]['tech_name']}':  {raster_files[index]}")
+
+            # load the raster for the staged grid; add to suitability array avoid overwriting the default dimension
+            suitability_array[index, :, :] = util.read_raster(raster_files[index], bounds=self.window) != 0
+
+        return suitability_array
+
+    def build_suitability_array(self):
+        """Build suitability array for all technologies."""
 
-                if self.initialize_site_data is not None:
-                    tech_arr = np.maximum(tech_arr, self.init_arr)
+        raster_files = self.suitability_raster_files()
 
-                # add to suitability array avoid overwriting the default dimension
-                suitability_array[index, :, :] = tech_arr
+        suitability_array = self.cached('suitability_arr',
+                                        ('suitability_arr', raster_files, self.nlc_arr.shape, 'bool', self.window),
+                                        lambda: self.load_suitability_rasters(raster_files))
+
+        # exclude the single mask of existing sites and their buffers for all technologies; not in place to keep
+        # cached data intact
+        if self.initialize_site_data is not None:
+            suitability_array = np.logical_or(suitability_array, self.init_arr.view(bool))
 
         return suitability_array
+
+    def share_arrays(self, directory=None):
+        """Write the staged arrays to NPY files and replace them with read-only memory-mapped arrays.  Parallel
+        workers using process based backends attach to memory-mapped arrays by reference instead of receiving a
+        pickled copy of each array and only read the pages for the region they slice.
+
+        :param directory:                   Full path to a directory to write the NPY files to, created if it does not
+                                            exist.  If None, a temporary directory is created under
+                                            `shared_array_directory` from the settings or the system default and is
+                                            removed once this object is garbage collected.
+        :type directory:                    str
+
+        """
+
+        if directory is None:
+            directory = tempfile.mkdtemp(prefix='cerf_', dir=self.settings_dict.get('shared_array_directory', None))
+            weakref.finalize(self, shutil.rmtree, directory, True)
+        else:
+            os.makedirs(directory, exist_ok=True)
+
+        logging.info(f"Sharing staged arrays through memory-mapped files in:  {directory}")
+
+        for name in self.SHARED_ARRAYS:
+            npy_file = os.path.join(directory, f"cerf_{name}.npy")
+
+            np.save(npy_file, getattr(self, name))
+
+            setattr(self, name, np.load(npy_file, mmap_mode='r'))
+
+        self.shared_directory = directory
@@ -1,14 +1,17 @@
-import os
 import logging
-import tempfile
+from functools import lru_cache
 
 import numpy as np
 import pandas as pd
 import rasterio
 import rioxarray
 import geopandas as gpd
+from rasterio.windows import Window
+from scipy.ndimage import binary_dilation, find_objects, maximum_filter1d
 from shapely.geometry import Point
 
+from cerf.grid import GridCoordinates
+
 
 def results_to_geodataframe(result_df, target_crs):
     """Convert the results from 'cerf.run()' to a GeoDataFrame.
@@ -129,6 +132,133 @@ def default_suitabiity_files():
             'wind_onshore': 'suitability_wind.sdat'}
 
 
+def buffer_stencil(buffer_in_km, cell_size=(1000.0, 1000.0), shape='square'):
+    """Get the row and column offsets of the grid cells covered by a buffer around a target grid cell.  Stencils
+    are built once per distinct buffer, cell size, and shape and then reused.
+
+    Offsets are ordered by row starting with the row of the target cell followed by alternating rows above and below
+    moving outward; each row is ordered by ascending column.
+
+    :param buffer_in_km:                The buffer extending as a radius in kilometers
+    :type buffer_in_km:                 int; float
+
+    :param cell_size:                   The (width, height) of a grid cell in meters as reported by the raster
+                                        resolution.  Default is 1 km grid cells.
+    :type cell_size:                    tuple
+
+    :param shape:                       Either 'square' for a window extending the buffer in each direction or
+                                        'circle' for grid cells whose center is within the buffer distance of the
+                                        center of the target grid cell.  Default 'square'.
+    :type shape:                        str
+
+    :return:                            [0] 1D array of row offsets
+                                        [1] 1D array of column offsets
+
+    """
+
+    return _build_buffer_stencil(float(buffer_in_km), float(abs(cell_size[0])), float(abs(cell_size[1])), shape)
+
+
+@lru_cache(maxsize=None)
+def _build_buffer_stencil(buffer_in_km, cell_width, cell_height, shape):
+    """Build the cached stencil offsets for `buffer_stencil`."""
+
+    buffer_in_m = buffer_in_km * 1000
+
+    # number of whole grid cells the buffer extends in each direction
+    nrow_cells = int(np.floor(buffer_in_m / cell_height + 1e-9))
+    ncol_cells = int(np.floor(buffer_in_m / cell_width + 1e-9))
+
+    # row offsets ordered as the target row and then alternating above and below
+    row_offsets = np.zeros(2 * nrow_cells + 1, dtype=np.int64)
+    row_offsets[1::2] = -np.arange(1, nrow_cells + 1)
+    row_offsets[2::2] = np.arange(1, nrow_cells + 1)
+
+    col_offsets = np.arange(-ncol_cells, ncol_cells + 1)
+
+    row_offsets, col_offsets = [i.ravel() for i in np.meshgrid(row_offsets, col_offsets, indexing='ij')]
+
+    if shape == 'circle':
+        within = (row_offsets * cell_height) ** 2 + (col_offsets * cell_width) ** 2 <= buffer_in_m ** 2 + 1e-9
+        row_offsets = row_offsets[within]
+        col_offsets = col_offsets[within]
+
+    elif shape != 'square':
+        raise ValueError(f"Buffer shape '{shape}' is not supported.  Must be 'square' or 'circle'.")
+
+    # cached arrays are shared so do not allow them to be modified
+    row_offsets.flags.writeable = False
+    col_offsets.flags.writeable = False
+
+    return row_offsets, col_offsets
+
+
+def stencil_flat_indices(target_index, nrows, ncols, stencil):
+    """Get the indices of the grid cells covered by a buffer stencil around one or more target elements of a 1D
+    array as if they were in 2D space.  Offsets falling outside the 2D space are clipped.
+
+    :param target_index:                Index or array of indices of the target elements in the 1D array
+    :type target_index:                 int; ndarray
+
+    :param nrows:                       The number of rows in the parent 2D array
+    :type nrows:                        int
+
+    :param ncols:                       The number of columns in the parent 2D array
+    :type ncols:                        int
+
+    :param stencil:                     Row and column offsets from `buffer_stencil`
+    :type stencil:                      tuple
+
+    :return:                            1D array of buffered indices
+
+    """
+
+    row_offsets, col_offsets = stencil
+
+    target_rows, target_cols = np.divmod(np.atleast_1d(target_index)[:, np.newaxis], ncols)
+
+    rows = target_rows + row_offsets
+    cols = target_cols + col_offsets
+
+    # do not let the stencil bleed past the edges of the grid space
+    valid = (rows >= 0) & (rows < nrows) & (cols >= 0) & (cols < ncols)
+
+    return rows[valid] * ncols + cols[valid]
+
+
+def buffer_flat_indices(target_index, nrows, ncols, ncells):
+    """Get the indices of the neighboring elements of a 1D array as if they were in 2D space.  The window extends
+    `ncells` in each direction around the target cell and is clipped to the edges of the 2D space.
+
+    Indices are ordered by row starting with the row of the target cell followed by alternating rows above and below
+    moving outward; each row is ordered by ascending column.
+
+    :param target_index:                Index of the target element in the 1D array
+    :type target_index:                 int
+
+    :param nrows:                       The number of rows in the parent 2D array
+    :type nrows:                        int
+
+    :param ncols:                       The number of columns in the parent 2D array
+    :type ncols:                        int
+
+    :param ncells:                      The number of cells for the buffer extending as a radius
+    :type ncells:                       int
+
+    :return:                            1D array of buffered indices
+
+    """
+
+    # calculate the number of elements in the 2D grid space
+    ngrids = nrows * ncols
+
+    # ensure that the target index is in the grid space
+    if not 0 <= target_index < ngrids:
+        raise IndexError(f"Index: '{target_index}' is not in the range of the grid space from 0 to {ngrids - 1}.")
+
+    return stencil_flat_indices(target_index, nrows, ncols, buffer_stencil(ncells))
+
+
 def buffer_flat_array(target_index, arr, nrows, ncols, ncells, set_value):
     """Assign a value to the neighboring elements of a 1D array as if they
     were in 2D space. The number of neighbors are based on the `ncells` argument
@@ -157,96 +287,83 @@ def buffer_flat_array(target_index, arr, nrows, ncols, ncells, set_value):
                                         [1] list of buffered indices
 
     """
-    # list to hold buffer indices for the target grid cell
-    buffer_indices = []
 
-    # calculate the number of elements in the 2D grid space
-    ngrids = nrows * ncols
+    buffer_indices = buffer_flat_indices(target_index, nrows, ncols, ncells)
 
-    # ensure that the target index is in the grid space
-    if 0 <= target_index < ngrids:
+    arr[buffer_indices] = set_value
 
-        # target cell index bounds for the row
-        min_idx = target_index - ncells
-        max_idx = target_index + ncells + 1
+    return arr, buffer_indices.tolist()
 
-        # create target row limits
-        end_row_idx = target_index + ncols - np.mod(target_index, ncols) - 1
-        start_row_idx = end_row_idx - (ncols - 1)
 
-        # do not let the index bleed past the row
-        if max_idx > end_row_idx:
-            max_idx = end_row_idx + 1
+def array_to_raster(arr, template_raster_file, output_raster_file):
+    """Write a raster file from a 2D array."""
 
-        # do not let the index go negative
-        if min_idx < start_row_idx:
-            min_idx = start_row_idx
+    with rasterio.open(template_raster_file) as src:
 
-        # initialize above
-        min_above = min_idx - ncols
-        max_above = max_idx - ncols
+        metadata = src.meta.copy()
 
-        # initialize below
-        min_below = min_idx + ncols
-        max_below = max_idx + ncols
+        # update metadata
+        metadata.update(dtype=np.float64,
+                        nodata=np.nan)
 
-        # target row assignment
-        arr[min_idx: max_idx] = set_value
+        with rasterio.open(output_raster_file, 'w', **metadata) as dest:
+            dest.write(arr, 1)
 
-        # add indices to buffer list
-        buffer_indices.extend(list(range(min_idx, max_idx)))
 
-        for _ in range(ncells):
+def window_slices(bounds=None):
+    """Get the row and column slices of a bounding box in the grid space.
 
-            # above
-            if min_above >= 0 and max_above >= 0 and start_row_idx < ngrids:
-                arr[min_above: max_above] = set_value
+    :param bounds:                          Bounding box as (ymin, ymax, xmin, xmax) grid cell positions.  If None, the
+                                            slices cover the entire grid space.
+    :type bounds:                           tuple
 
-                # add indices to buffer list
-                buffer_indices.extend(list(range(min_above, max_above)))
+    :return:                                [0] slice of rows
+                                            [1] slice of columns
 
-            # advance above to the next row
-            min_above -= ncols
-            max_above -= ncols
+    """
 
-            # below
-            if min_below <= ngrids and max_below <= ngrids:
-                arr[min_below: max_below] = set_value
+    if bounds is None:
+        return slice(None), slice(None)
 
-                # add indices to buffer list
-                buffer_indices.extend(list(range(min_below, max_below)))
+    ymin, ymax, xmin, xmax = bounds
 
-            # advance below to the next row
-            min_below += ncols
-            max_below += ncols
+    return slice(ymin, ymax), slice(xmin, xmax)
 
-    else:
-        raise IndexError(f"Index: '{target_index}' is not in the range of the grid space from 0 to {ngrids - 1}.")
 
-    return arr, buffer_indices
+def read_raster(raster_file, bounds=None):
+    """Read the first band of a raster into a 2D array.  Only the grid cells within the bounding box are read.
 
+    :param raster_file:                     Full path with file name and extension to the input raster
+    :type raster_file:                      str
 
-def array_to_raster(arr, template_raster_file, output_raster_file):
-    """Write a raster file from a 2D array."""
+    :param bounds:                          Bounding box as (ymin, ymax, xmin, xmax) grid cell positions to read.  If
+                                            None, the entire raster is read.
+    :type bounds:                           tuple
 
-    with rasterio.open(template_raster_file) as src:
+    :return:                                2D array of raster values
 
-        metadata = src.meta.copy()
+    """
 
-        # update metadata
-        metadata.update(dtype=np.float64,
-                        nodata=np.nan)
+    with rasterio.open(raster_file) as src:
 
-        with rasterio.open(output_raster_file, 'w', **metadata) as dest:
-            dest.write(arr, 1)
+        if bounds is None:
+            return src.read(1)
+
+        ymin, ymax, xmin, xmax = bounds
+
+        return src.read(1, window=Window.from_slices((ymin, ymax), (xmin, xmax)))
 
 
-def raster_to_coord_arrays(template_raster):
+def raster_to_coord_arrays(template_raster, bounds=None):
     """Use the template raster to create two 2D arrays containing the X and Y coordinates of every grid cell.
 
     :param template_raster:                 Full path with file name and extension to the input raster.
     :type template_raster:                  str
 
+    :param bounds:                          Bounding box as (ymin, ymax, xmin, xmax) grid cell positions to create
+                                            coordinates for.  If None, coordinates are created for the entire raster.
+    :type bounds:                           tuple
+
     :return:                                [0] 2D array of X coordinates
                                             [1] 2D array of Y coordinates
 
@@ -255,16 +372,172 @@ def raster_to_coord_arrays(template_raster):
     # Read the data
     da = rioxarray.open_rasterio(template_raster)
 
+    rows, cols = window_slices(bounds)
+
     # Compute the lon/lat coordinates with rasterio.warp.transform
-    x, y = np.meshgrid(da['x'], da['y'])
+    x, y = np.meshgrid(da['x'][cols], da['y'][rows])
 
     return x, y
 
 
+def build_region_index(region_raster_file, region_ids=None):
+    """Build the bounding box and in-region mask of every region in the region raster in a single pass.
+
+    :param region_raster_file:              Full path with file name and extension to the region raster file that
+                                            assigns a region ID to each raster grid cell
+    :type region_raster_file:               str
+
+    :param region_ids:                      List of region IDs to index.  If None, all positive region IDs other than
+                                            the nodata value of the raster are indexed.
+    :type region_ids:                       list
+
+    :return:                                Dictionary of {region_id: {'bounds': (ymin, ymax, xmin, xmax),
+                                            'mask': 2D boolean array of the bounding box where True is in the region},
+                                            ...}.  Regions not in the raster are not included.
+
+    """
+
+    with rasterio.open(region_raster_file) as src:
+        regions_arr = src.read(1)
+        nodata = src.nodata
+
+    # only positive region IDs are labels; all other values and nodata are treated as background
+    in_region = regions_arr > 0
+
+    if nodata is not None:
+        in_region &= regions_arr != nodata
+
+    if region_ids is None:
+        max_label = int(regions_arr[in_region].max()) if in_region.any() else 0
+    else:
+        max_label = int(max(region_ids))
+
+    labels = np.where(in_region & (regions_arr <= max_label), regions_arr, 0).astype(np.int32)
+
+    region_index = {}
+    for region_id, region_slice in enumerate(find_objects(labels, max_label=max_label), 1):
+
+        if region_slice is None or (region_ids is not None and region_id not in region_ids):
+            continue
+
+        row_slice, col_slice = region_slice
+
+        region_index[region_id] = {'bounds': (row_slice.start, row_slice.stop, col_slice.start, col_slice.stop),
+                                   'mask': labels[region_slice] == region_id}
+
+    return region_index
+
+
+class ExclusionBuilder:
+    """Build a single boolean mask of the grid cells excluded by sites and their buffers.  Sites are grouped by
+    buffer size and each group is applied in one pass; either by scattering the buffer stencil around every site or
+    by dilating a mask of the sites with the footprint of the buffer, whichever requires less work.  Square buffers are
+    dilated with a separable maximum filter.
+
+    :param shape:                           The (height, width) of the grid space
+    :type shape:                            tuple
+
+    :param cell_size:                       The (width, height) of a grid cell in meters.  Default is 1 km grid cells.
+    :type cell_size:                        tuple
+
+    :param buffer_shape:                    Either 'square' or 'circle' for the shape of the buffer around each site.
+                                            Default 'square'.
+    :type buffer_shape:                     str
+
+    :param max_scatter_size:                Maximum number of buffered grid cell indices to generate at once
+    :type max_scatter_size:                 int
+
+    """
+
+    def __init__(self, shape, cell_size=(1000.0, 1000.0), buffer_shape='square', max_scatter_size=2 ** 22):
+
+        self.shape = tuple(shape)
+        self.cell_size = cell_size
+        self.buffer_shape = buffer_shape
+        self.max_scatter_size = max_scatter_size
+
+        # flat grid indices of sites per buffer size as {buffer_in_km: [index_array, ...]}
+        self.groups = {}
+
+    def add(self, index, buffer_in_km):
+        """Add sites to exclude along with their buffers.
+
+        :param index:                       Flat grid index or array of flat grid indices of the sites
+        :type index:                        int; ndarray
+
+        :param buffer_in_km:                Buffer per site or a single buffer for all sites in kilometers
+        :type buffer_in_km:                 int; float; ndarray
+
+        """
+
+        index = np.atleast_1d(np.asarray(index, dtype=np.int64))
+        buffer_in_km = np.broadcast_to(np.asarray(buffer_in_km, dtype=np.float64), index.shape)
+
+        for site_buffer_km in np.unique(buffer_in_km):
+            self.groups.setdefault(float(site_buffer_km), []).append(index[buffer_in_km == site_buffer_km])
+
+    def scatter(self, mask, index, stencil):
+        """Set the buffer stencil around each site in the flat mask."""
+
+        chunk_size = max(1, self.max_scatter_size // stencil[0].shape[0])
+
+        for start in range(0, index.shape[0], chunk_size):
+            mask[stencil_flat_indices(index[start:start + chunk_size], self.shape[0], self.shape[1], stencil)] = True
+
+    def dilate(self, index, stencil):
+        """Dilate a mask of the sites by the footprint of the buffer stencil."""
+
+        row_offsets, col_offsets = stencil
+        row_reach = int(np.abs(row_offsets).max())
+        col_reach = int(np.abs(col_offsets).max())
+
+        sites = np.zeros(self.shape, dtype=np.uint8)
+        sites.flat[index] = 1
+
+        # a square buffer is the same as a maximum over the rows followed by a maximum over the columns
+        if self.buffer_shape == 'square':
+            dilated = maximum_filter1d(sites, 2 * row_reach + 1, axis=0, mode='constant', cval=0)
+            return maximum_filter1d(dilated, 2 * col_reach + 1, axis=1, mode='constant', cval=0).view(bool)
+
+        footprint = np.zeros((2 * row_reach + 1, 2 * col_reach + 1), dtype=bool)
+        footprint[row_offsets + row_reach, col_offsets + col_reach] = True
+
+        return binary_dilation(sites.view(bool), structure=footprint)
+
+    def build(self):
+        """Build the mask of excluded grid cells.
+
+        :return:                            2D boolean array where True is excluded by a site or its buffer
+
+        """
+
+        n_cells = self.shape[0] * self.shape[1]
+        mask = np.zeros(n_cells, dtype=bool)
+
+        for site_buffer_km, index_list in self.groups.items():
+
+            index = np.unique(np.concatenate(index_list))
+            stencil = buffer_stencil(site_buffer_km, cell_size=self.cell_size, shape=self.buffer_shape)
+            stencil_size = stencil[0].shape[0]
+
+            # work in grid cell visits to scatter each stencil or to dilate the full grid
+            scatter_work = index.shape[0] * stencil_size
+            dilate_work = 2 * n_cells if self.buffer_shape == 'square' else n_cells * stencil_size
+
+            if scatter_work <= dilate_work:
+                self.scatter(mask, index, stencil)
+            else:
+                mask |= self.dilate(index, stencil).ravel()
+
+        return mask.reshape(self.shape)
+
+
 def ingest_sited_data(run_year,
                       x_array,
                       siting_data,
-                      template_raster_file: str):
+                      template_raster_file: str,
+                      buffer_shape='square',
+                      max_scatter_size=2 ** 22):
     """Import sited data containing the locations and additional data to establish an initial suitability condition
     representing power plants and their siting buffer.
 
@@ -278,7 +551,8 @@ def ingest_sited_data(run_year,
     :param run_year:                        Four-digit year of the current run (e.g., 2050)
     :type run_year:                         int
 
-    :param x_array:                         2D array of X coordinates for the entire grid space
+    :param x_array:                         2D array of X coordinates for the entire grid space.  Only its shape is
+                                            used.  If None, the shape of the template raster is used.
     :type x_array:                          ndarray
 
     :param siting_data:                     Full path with file name and extension for the input siting file or a
@@ -289,6 +563,13 @@ def ingest_sited_data(run_year,
                                             containing a grid index value per grid cell.
     :type template_raster_file:             str
 
+    :param buffer_shape:                    Either 'square' or 'circle' for the shape of the buffer around each site.
+                                            Default 'square'.
+    :type buffer_shape:                     str
+
+    :param max_scatter_size:                Maximum number of buffered grid cell indices to generate at once
+    :type max_scatter_size:                 int
+
     :return:                                [0] 2D array of 0 (suitable) and 1 (unsuitable) values where 1 are the sites
                                             and their buffers of active power plants
 
@@ -309,51 +590,33 @@ def ingest_sited_data(run_year,
     # only keep sites that are not retired
     df_active = df.loc[df['retirement_year'] > run_year].copy()
 
-    # initialize an array to hold the 0, 1 sited and buffer data
-    sited_arr = np.zeros_like(x_array).flatten()
-
-    # generate the corresponding grid index for the input coordinate pairs
+    # width and height of a grid cell used to size the buffers
     with rasterio.open(template_raster_file) as src:
-        metadata = src.meta.copy()
-
-        # get array
-        arr = src.read(1)
-        n_cells = arr.shape[0] * arr.shape[1]
-        max_allowable_cells = np.iinfo(rasterio.uint32).max
-
-        if n_cells > max_allowable_cells:
-            raise ValueError(f"Too many grid cells in array for a uint32 format.  Max allowable: {max_allowable_cells}")
+        cell_size = src.res
 
-        # create continuous index values from flat array and then reshape back to 2D
-        flat_arr = np.array(range(arr.shape[0] * arr.shape[1]))
-        index_arr = flat_arr.reshape((arr.shape[0], arr.shape[1])).astype(np.uint32)
+    # generate the corresponding grid index for the input coordinate pairs from the inverse of the grid transform
+    coordinates = GridCoordinates.from_raster(template_raster_file)
+    located_index, in_grid = coordinates.index(df_active['xcoord'].values, df_active['ycoord'].values)
 
-        # update data type
-        metadata.update(dtype=np.uint32)
+    if not in_grid.all():
+        logging.warning(f"{np.count_nonzero(~in_grid)} sites are outside of the grid space and will not be initialized")
+        df_active = df_active.loc[in_grid].copy()
+        located_index = located_index[in_grid]
 
-    with tempfile.TemporaryDirectory() as tempdir:
-
-        # construct temporary raster file name
-        out_temp_rast = os.path.join(tempdir, "cerf_temp_raster.tif")
-
-        # write array as spatial in a temp file
-        with rasterio.open(out_temp_rast, "w", **metadata) as dest:
-            dest.write(index_arr, 1)
-
-        # read temp file to use for grid search
-        with rasterio.open(out_temp_rast) as idx:
-            index_generator = idx.sample(df_active[["xcoord", "ycoord"]].values)
-            located_index_list = [i[0] for i in index_generator]
+    # shape of the entire grid space
+    grid_shape = coordinates.shape if x_array is None else x_array.shape
 
     # give the input data frame the new index from the coordinate lookup
-    df_active["index"] = located_index_list
-
-    for ix in df_active['index'].tolist():
+    df_active["index"] = located_index.astype(np.uint32)
 
-        # get the buffer size for the site
-        site_buffer_km = df_active.loc[df_active['index'] == ix]['buffer_in_km'].values[0]
+    # where several sites share a grid cell, the buffer of the first one listed applies to the grid cell
+    site_index, first_position = np.unique(located_index, return_index=True)
+    site_buffers = df_active['buffer_in_km'].values[first_position]
 
-        # apply the buffer to the site and set to the entire array
-        sited_arr = buffer_flat_array(ix, sited_arr, x_array.shape[0], x_array.shape[1], site_buffer_km, 1)[0]
+    # apply the buffers of all sites sharing a buffer size at once
+    exclusion = ExclusionBuilder(grid_shape, cell_size=cell_size, buffer_shape=buffer_shape,
+                                 max_scatter_size=max_scatter_size)
+    exclusion.add(site_index, site_buffers)
 
-    return sited_arr.reshape(x_array.shape).astype(np.int8), df_active
+    # the boolean mask is returned as 0, 1 values without a copy
+    return exclusion.build().view(np.int8), df_active
@@ -0,0 +1,158 @@
+"""Synthetic inputs for running CERF end to end on a small grid without the package data.
+
+@author Chris R. vernon
+@email chris.vernon@pnnl.gov
+
+License:  BSD 2-Clause, see LICENSE and DISCLAIMER files
+
+"""
+
+import os
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import rasterio
+import yaml
+from rasterio.transform import from_origin
+from shapely.geometry import LineString, Point
+
+
+# (height, width) of the synthetic grid having 1 km grid cells
+GRID_SHAPE = (20, 30)
+
+# nodata value of the synthetic region raster
+REGION_NODATA = 255
+
+# region name to region ID of the synthetic region raster
+REGIONS = {'north': 1, 'south': 2}
+
+
+def write_raster(raster_file, arr, nodata=None):
+    """Write a 2D array to a GeoTIFF in the synthetic grid space."""
+
+    with rasterio.open(raster_file, 'w', driver='GTiff', height=arr.shape[0], width=arr.shape[1], count=1,
+                       dtype=arr.dtype, transform=from_origin(0, 20000, 1000, 1000), crs='EPSG:5070',
+                       nodata=nodata) as dest:
+        dest.write(arr, 1)
+
+    return raster_file
+
+
+def write_yaml(yaml_file, data):
+    """Write a dictionary to a YAML file."""
+
+    with open(yaml_file, 'w') as dest:
+        yaml.dump(data, dest)
+
+    return yaml_file
+
+
+def write_substations(substation_file, min_volt):
+    """Write two substations having the minimum voltages in `min_volt` to a shapefile."""
+
+    gpd.GeoDataFrame({'min_volt': min_volt},
+                     geometry=[Point(2500, 17500), Point(25500, 3500)],
+                     crs='EPSG:5070').to_file(substation_file)
+
+    return substation_file
+
+
+def create_config(directory, run_year=2030, settings=None):
+    """Write the inputs of a two region, two technology run to a directory and build its configuration dictionary.
+    Grid cells outside of the regions are given the nodata value of the region raster.
+
+    :param directory:                   Full path to the directory to write the inputs to
+    :type directory:                    str
+
+    :param run_year:                    Target year of the run
+    :type run_year:                     int
+
+    :param settings:                    Settings to add to or replace in the configuration
+    :type settings:                     dict
+
+    :return:                            Configuration dictionary
+
+    """
+
+    rng = np.random.default_rng(0)
+
+    regions = np.full(GRID_SHAPE, REGION_NODATA, dtype=np.int32)
+    regions[2:9, 3:12] = REGIONS['north']
+    regions[10:18, 5:25] = REGIONS['south']
+    regions[12, 4] = REGIONS['south']
+
+    zones = (np.arange(regions.size).reshape(GRID_SHAPE) % 3 + 1).astype(np.int32)
+    zones[:, 20:] = 4
+
+    region_raster_file = os.path.join(directory, 'regions.tif')
+    if not os.path.isfile(region_raster_file):
+
+        write_raster(region_raster_file, regions, nodata=REGION_NODATA)
+        write_raster(os.path.join(directory, 'zones.tif'), zones)
+
+        for tech_id in (1, 2):
+            write_raster(os.path.join(directory, f'suitability_{tech_id}.tif'),
+                         (rng.random(GRID_SHAPE) < 0.3).astype(np.uint8))
+
+        lmp_df = pd.DataFrame({'hour': range(1, 8761), **{str(i): rng.uniform(10, 100, 8760) for i in (1, 2, 3, 4)}})
+        lmp_df.to_csv(os.path.join(directory, 'lmp.csv'), index=False)
+
+        write_substations(os.path.join(directory, 'substations.shp'), [100, 300])
+
+        gpd.GeoDataFrame({'id': [1]},
+                         geometry=[LineString([(500, 10500), (29500, 10500)])],
+                         crs='EPSG:5070').to_file(os.path.join(directory, 'pipelines.shp'))
+
+        write_yaml(os.path.join(directory, 'transmission_costs.yml'),
+                   {'low': {'min_voltage': 0, 'max_voltage': 200, 'thous_dollar_per_km': 10},
+                    'high': {'min_voltage': 201, 'max_voltage': 1000, 'thous_dollar_per_km': 20}})
+
+        write_yaml(os.path.join(directory, 'pipeline_costs.yml'), {'gas_pipeline_cost': 5})
+        write_yaml(os.path.join(directory, 'region_abbrev_to_name.yml'), {'N': 'north', 'S': 'south'})
+        write_yaml(os.path.join(directory, 'region_name_to_id.yml'), REGIONS)
+
+    technology = {}
+    for tech_id, tech_name, capacity_factor in ((1, 'gas', 0.5), (2, 'wind', 0.3)):
+        technology[tech_id] = {'tech_name': tech_name,
+                               'lifetime_yrs': 30,
+                               'operational_life_yrs': 30,
+                               'capacity_factor_fraction': capacity_factor,
+                               'variable_om_esc_rate_fraction': 0.0,
+                               'fuel_price_esc_rate_fraction': 0.01,
+                               'unit_size_mw': 100,
+                               'variable_om_usd_per_mwh': 1.0,
+                               'heat_rate_btu_per_kWh': 9000,
+                               'fuel_price_usd_per_mmbtu': 3.0,
+                               'carbon_capture_rate_fraction': 0.0,
+                               'fuel_co2_content_tons_per_btu': 0.0,
+                               'discount_rate': 0.05,
+                               'carbon_tax_esc_rate_fraction': 0.0,
+                               'carbon_tax_usd_per_ton': 0.0,
+                               'buffer_in_km': 1,
+                               'require_pipelines': tech_id == 1,
+                               'suitability_raster_file': os.path.join(directory, f'suitability_{tech_id}.tif')}
+
+    config = {'settings': {'run_year': run_year,
+                           'output_directory': directory,
+                           'randomize': False,
+                           'seed_value': 0,
+                           'region_raster_file': region_raster_file,
+                           'region_abbrev_to_name_file': os.path.join(directory, 'region_abbrev_to_name.yml'),
+                           'region_name_to_id_file': os.path.join(directory, 'region_name_to_id.yml')},
+              'technology': technology,
+              'expansion_plan': {'north': {1: {'tech_name': 'gas', 'n_sites': 3},
+                                           2: {'tech_name': 'wind', 'n_sites': 3}},
+                                 'south': {1: {'tech_name': 'gas', 'n_sites': 4},
+                                           2: {'tech_name': 'wind', 'n_sites': 5}}},
+              'lmp_zones': {'lmp_zone_raster_file': os.path.join(directory, 'zones.tif'),
+                            'lmp_zone_raster_nodata_value': 255,
+                            'lmp_hourly_data_file': os.path.join(directory, 'lmp.csv')},
+              'infrastructure': {'substation_file': os.path.join(directory, 'substations.shp'),
+                                 'pipeline_file': os.path.join(directory, 'pipelines.shp'),
+                                 'transmission_costs_file': os.path.join(directory, 'transmission_costs.yml'),
+                                 'pipeline_costs_file': os.path.join(directory, 'pipeline_costs.yml')}}
+
+    config['settings'].update(settings or {})
+
+    return config
@@ -0,0 +1,76 @@
+"""Tests for the staging cache.
+
+:author:   Chris R. Vernon
+:email:    chris.vernon@pnnl.gov
+
+License:  BSD 2-Clause, see LICENSE and DISCLAIMER files
+
+"""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from cerf.cache import StagingCache, cache_key
+
+
+class TestCache(unittest.TestCase):
+    """Tests for the staging cache."""
+
+    def test_cache_key(self):
+        """Test to make sure keys follow the content of input files and parameters."""
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            input_file = os.path.join(tmp_dir, 'input.csv')
+
+            with open(input_file, 'w') as dest:
+                dest.write('a,b\n1,2\n')
+
+            key = cache_key('lmp_arr', {'lmp_hourly_data_file': input_file}, [0.5])
+
+            # same inputs give the same key
+            self.assertEqual(key, cache_key('lmp_arr', {'lmp_hourly_data_file': input_file}, [0.5]))
+
+            # a different parameter gives a different key
+            self.assertNotEqual(key, cache_key('lmp_arr', {'lmp_hourly_data_file': input_file}, [0.6]))
+
+            # a renamed file with the same content gives the same key
+            renamed_file = os.path.join(tmp_dir, 'renamed.csv')
+            os.rename(input_file, renamed_file)
+            self.assertEqual(key, cache_key('lmp_arr', {'lmp_hourly_data_file': renamed_file}, [0.5]))
+
+            # editing the file gives a different key
+            with open(renamed_file, 'w') as dest:
+                dest.write('a,b\n1,3\n')
+
+            self.assertNotEqual(key, cache_key('lmp_arr', {'lmp_hourly_data_file': renamed_file}, [0.5]))
+
+    def test_get_or_compute(self):
+        """Test to make sure products are only computed when they are not in the cache."""
+
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return np.arange(6.0).reshape(2, 3), np.ones(3)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = StagingCache(tmp_dir)
+
+            first = cache.get_or_compute(('a_arr', 'b_arr'), 'key', compute)
+            second = cache.get_or_compute(('a_arr', 'b_arr'), 'key', compute)
+
+            self.assertEqual(1, len(calls))
+
+            for computed, loaded in zip(first, second):
+                np.testing.assert_array_equal(computed, loaded)
+
+            # a single product is returned as an array
+            single = cache.get_or_compute('c_arr', 'key', lambda: np.zeros(2))
+            np.testing.assert_array_equal(np.zeros(2), single)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,10 @@
 import unittest
 
 import numpy as np
+import pandas as pd
 
-from cerf.compete import Competition
+import cerf.utils as util
+from cerf.compete import CheapestTracker, Competition, SiteRecords
 
 
 class TestCompete(unittest.TestCase):
@@ -157,6 +159,136 @@ class TestCompete(unittest.TestCase):
         # check sited dict match
         self.assertEqual(TestCompete.COMP_SITED_DICT, comp.sited_dict)
 
+    def test_competition_penalty_array(self):
+        """Ensure a plain NLC array with +inf for unsuitable grid cells sites the same as a masked array."""
+
+        nlc_arr = np.ma.filled(self.create_masked_nlc_array(), np.inf)
+
+        fake_dict, fake_flat_array = self.create_proxy_arrays()
+
+        comp = Competition(target_region_name='test',
+                           settings_dict=TestCompete.SETTINGS_DICT,
+                           technology_dict=TestCompete.TECH_DICT,
+                           technology_order=TestCompete.TECH_ORDER,
+                           expansion_dict={i: {'n_sites': 1, 'tech_name': f'test{i}'} for i in TestCompete.TECH_ORDER},
+                           lmp_dict=fake_dict,
+                           generation_dict=fake_dict,
+                           operating_cost_dict=fake_dict,
+                           nov_dict=fake_dict,
+                           ic_dict=fake_dict,
+                           nlc_mask=nlc_arr,
+                           zones_arr=fake_flat_array.astype(np.int32),
+                           xcoords=fake_flat_array,
+                           ycoords=fake_flat_array,
+                           indices_flat=fake_flat_array,
+                           randomize=False,
+                           seed_value=0,
+                           verbose=False)
+
+        np.testing.assert_array_equal(TestCompete.COMP_SITED, comp.sited_array)
+        self.assertEqual(TestCompete.COMP_SITED_DICT, comp.sited_dict)
+
+    def test_cheapest_tracker(self):
+        """Ensure retiring a technology matches a full recalculation of the cheapest option."""
+
+        nlc_arr = self.create_masked_nlc_array()
+
+        tracker = CheapestTracker(nlc_arr, np.ones(nlc_arr.shape[0], dtype=bool))
+
+        np.testing.assert_array_equal(np.argmin(nlc_arr, axis=0).flatten(), tracker.best)
+
+        # retire the technology at index 3 and compare against a fully masked recalculation
+        tracker.retire(3)
+        nlc_arr[3, :, :] = np.ma.masked
+
+        np.testing.assert_array_equal(np.argmin(nlc_arr, axis=0).flatten(), tracker.best)
+        self.assertEqual(np.count_nonzero(np.argmin(nlc_arr, axis=0)), tracker.n_available)
+
+    def test_conflict_free_prefix(self):
+        """Ensure batches stop at the first winner falling within the buffer of an earlier winner."""
+
+        stencil = util.buffer_stencil(1)
+
+        # grid index 11 is diagonal to grid index 0 in a 10 x 10 grid
+        candidates = np.array([0, 5, 22, 11, 99])
+        self.assertEqual(3, Competition.conflict_free_prefix(candidates, 10, stencil))
+
+        # the corners of a square buffer are outside of a circular buffer
+        self.assertEqual(5, Competition.conflict_free_prefix(candidates, 10, util.buffer_stencil(1, shape='circle')))
+
+    def test_batch_placement(self):
+        """Ensure placing conflict free batches of winners sites the same as one site per iteration when NLC values
+        are distinct."""
+
+        rng = np.random.default_rng(0)
+
+        n_rows, n_cols = 40, 50
+        technology_order = [1, 2, 3]
+
+        # distinct NLC values with unsuitable grid cells as +inf and the excluded default dimension
+        nlc_arr = rng.permutation(len(technology_order) * n_rows * n_cols).astype(np.float64)
+        nlc_arr = nlc_arr.reshape((len(technology_order), n_rows, n_cols))
+        nlc_arr[rng.random(nlc_arr.shape) < 0.3] = np.inf
+        nlc_arr = np.insert(nlc_arr, 0, np.full((n_rows, n_cols), np.inf), axis=0)
+
+        # technologies having different buffers; the last requests more sites than fit in the region
+        technology_dict = {i: dict(TestCompete.SAMPLE_TECH_DICT, buffer_in_km=i) for i in technology_order}
+        n_sites = {1: 40, 2: 25, 3: 200}
+
+        flat_dict = {i: nlc_arr[i].flatten() for i in technology_order}
+        flat_arr = np.arange(n_rows * n_cols, dtype=np.float64)
+
+        for buffer_shape in ('square', 'circle'):
+
+            outcomes = []
+            for batch_placement in (False, True):
+
+                settings_dict = dict(TestCompete.SETTINGS_DICT,
+                                     buffer_shape=buffer_shape,
+                                     batch_placement=batch_placement)
+
+                comp = Competition(target_region_name='test',
+                                   settings_dict=settings_dict,
+                                   technology_dict=technology_dict,
+                                   technology_order=technology_order,
+                                   expansion_dict={i: {'n_sites': n_sites[i], 'tech_name': f'test{i}'}
+                                                   for i in technology_order},
+                                   lmp_dict=flat_dict,
+                                   generation_dict=flat_dict,
+                                   operating_cost_dict=flat_dict,
+                                   nov_dict=flat_dict,
+                                   ic_dict=flat_dict,
+                                   nlc_mask=nlc_arr.copy(),
+                                   zones_arr=np.ones(n_rows * n_cols, dtype=np.int32),
+                                   xcoords=flat_arr,
+                                   ycoords=flat_arr,
+                                   indices_flat=flat_arr,
+                                   randomize=False,
+                                   seed_value=0,
+                                   verbose=False)
+
+                outcomes.append((comp.sited_array, comp.sited_df.reset_index(drop=True), comp.expansion_dict))
+
+            (sequential_arr, sequential_df, sequential_plan), (batch_arr, batch_df, batch_plan) = outcomes
+
+            self.assertGreater(len(sequential_df), 50)
+            np.testing.assert_array_equal(sequential_arr, batch_arr)
+            pd.testing.assert_frame_equal(sequential_df, batch_df)
+            self.assertEqual(sequential_plan, batch_plan)
+
+    def test_site_records(self):
+        """Ensure site records keep their order when growing past the expected number of sites."""
+
+        records = SiteRecords(expected_sites=2)
+
+        for i in range(5):
+            records.append(i * 10, i % 3 + 1)
+
+        site_index, tech_index = records.sites()
+
+        np.testing.assert_array_equal(np.array([0, 10, 20, 30, 40]), site_index)
+        np.testing.assert_array_equal(np.array([1, 2, 3, 1, 2]), tech_index)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,72 @@
+"""Tests for grid space coordinates.
+
+:author:   Chris R. Vernon
+:email:    chris.vernon@pnnl.gov
+
+License:  BSD 2-Clause, see LICENSE and DISCLAIMER files
+
+"""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import rasterio
+from rasterio.transform import from_origin
+
+import cerf.utils as util
+from cerf.grid import GridCoordinates, GridIndex
+
+
+class TestGrid(unittest.TestCase):
+
+    def test_grid_coordinates(self):
+        """Test to make sure coordinates computed from grid indices match the coordinate arrays of the raster."""
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            raster_file = os.path.join(tmp_dir, 'grid.tif')
+
+            with rasterio.open(raster_file, 'w', driver='GTiff', height=7, width=9, count=1, dtype='uint8',
+                               transform=from_origin(-2356125.3, 3172567.1, 1000.0, 1000.0)) as dest:
+                dest.write(np.zeros((7, 9), dtype=np.uint8), 1)
+
+            xcoords, ycoords = util.raster_to_coord_arrays(raster_file)
+            coordinates = GridCoordinates.from_raster(raster_file)
+
+        self.assertEqual((7, 9), coordinates.shape)
+
+        index = np.array([0, 8, 9, 31, 62])
+        x, y = coordinates.xy(index)
+
+        np.testing.assert_array_equal(xcoords.flatten()[index], x)
+        np.testing.assert_array_equal(ycoords.flatten()[index], y)
+
+        rows, cols = coordinates.rowcol(index)
+        np.testing.assert_array_equal(np.array([0, 0, 1, 3, 6]), rows)
+        np.testing.assert_array_equal(np.array([0, 8, 0, 4, 8]), cols)
+
+        # coordinates map back to the grid cell that contains them
+        located_index, in_grid = coordinates.index(np.append(x, 0.0), np.append(y, 0.0))
+        np.testing.assert_array_equal(index, located_index[:-1])
+        np.testing.assert_array_equal(np.array([True, True, True, True, True, False]), in_grid)
+
+    def test_grid_index(self):
+        """Test to make sure offsets within nested windows convert to the flat index of the full grid space."""
+
+        indices_2d = np.arange(7 * 9).reshape(7, 9)
+
+        # a staged window of the full grid and a region window within it
+        staged = GridIndex((7, 9), bounds=(1, 6, 2, 9))
+        region = staged.window((1, 4, 3, 6))
+
+        self.assertEqual((2, 5, 5, 8), region.bounds)
+        self.assertEqual((3, 3), region.window_shape)
+
+        offsets = np.arange(9)
+        np.testing.assert_array_equal(indices_2d[2:5, 5:8].flatten(), region.to_grid(offsets))
+        np.testing.assert_array_equal(indices_2d[1:6, 2:9].flatten(), staged.to_grid(np.arange(35)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,13 @@
 import os
+import tempfile
 import unittest
 
+import geopandas as gpd
 import numpy as np
+import rasterio
+import yaml
+from rasterio.transform import from_origin
+from shapely.geometry import LineString, Point
 
 from cerf.read_config import ReadConfig
 from cerf.interconnect import Interconnection
@@ -65,6 +71,69 @@ class TestInterconnection(unittest.TestCase):
 
         np.testing.assert_array_equal(TestInterconnection.EXPECTED_SUBSET, ic_arr_subset)
 
+    def test_interconnection_cache(self):
+        """Test to make sure cached distance and allocation fields reproduce the interconnection costs."""
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+
+            # build a small grid with two substations and one pipeline
+            region_raster_file = os.path.join(tmp_dir, 'regions.tif')
+            with rasterio.open(region_raster_file, 'w', driver='GTiff', height=20, width=30, count=1, dtype='int32',
+                               transform=from_origin(0, 20000, 1000, 1000), crs='EPSG:5070') as dest:
+                dest.write(np.ones((20, 30), dtype=np.int32), 1)
+
+            substation_file = os.path.join(tmp_dir, 'substations.shp')
+            gpd.GeoDataFrame({'min_volt': [100, 300]},
+                             geometry=[Point(2500, 17500), Point(25500, 3500)],
+                             crs='EPSG:5070').to_file(substation_file)
+
+            pipeline_file = os.path.join(tmp_dir, 'pipelines.shp')
+            gpd.GeoDataFrame({'id': [1]},
+                             geometry=[LineString([(500, 10500), (29500, 10500)])],
+                             crs='EPSG:5070').to_file(pipeline_file)
+
+            transmission_costs_file = os.path.join(tmp_dir, 'transmission_costs.yml')
+            with open(transmission_costs_file, 'w') as dest:
+                yaml.dump({'low': {'min_voltage': 0, 'max_voltage': 200, 'thous_dollar_per_km': 10},
+                           'high': {'min_voltage': 201, 'max_voltage': 1000, 'thous_dollar_per_km': 20}}, dest)
+
+            pipeline_costs_file = os.path.join(tmp_dir, 'pipeline_costs.yml')
+            with open(pipeline_costs_file, 'w') as dest:
+                yaml.dump({'gas_pipeline_cost': 5}, dest)
+
+            cache_directory = os.path.join(tmp_dir, 'cache')
+
+            def interconnection_costs(cache_directory=None, window=None):
+                shape = (20, 30) if window is None else (window[1] - window[0], window[3] - window[2])
+                ic = Interconnection(template_array=np.zeros(shape=(1,) + shape),
+                                     technology_dict={1: {'require_pipelines': True,
+                                                          'discount_rate': 0.05,
+                                                          'lifetime_yrs': 30}},
+                                     technology_order=[1],
+                                     region_raster_file=region_raster_file,
+                                     region_abbrev_to_name_file=None,
+                                     region_name_to_id_file=None,
+                                     substation_file=substation_file,
+                                     transmission_costs_file=transmission_costs_file,
+                                     pipeline_costs_file=pipeline_costs_file,
+                                     pipeline_file=pipeline_file,
+                                     cache_directory=cache_directory,
+                                     window=window)
+
+                return ic.generate_interconnection_costs_array()
+
+            expected = interconnection_costs()
+
+            # first run builds the cache and the second loads from it
+            np.testing.assert_array_equal(expected, interconnection_costs(cache_directory))
+            self.assertEqual(4, len(os.listdir(cache_directory)))
+
+            np.testing.assert_array_equal(expected, interconnection_costs(cache_directory))
+
+            # costs for a window measure distances to infrastructure outside of it
+            np.testing.assert_array_equal(expected[:, 3:12, 5:20],
+                                          interconnection_costs(cache_directory, window=(3, 12, 5, 20)))
+
 
 if __name__ == '__main__':
     unittest.main()
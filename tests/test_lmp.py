@@ -1,11 +1,13 @@
 import os
+import tempfile
 import unittest
 
 import numpy as np
+import pandas as pd
 import pkg_resources
 import rasterio
 
-from cerf.lmp import LocationalMarginalPricing
+from cerf.lmp import LocationalMarginalPricing, convert_lmp_file, read_lmp_file
 from cerf.read_config import ReadConfig
 
 
@@ -63,6 +65,60 @@ class TestLmp(unittest.TestCase):
         # test LMP array equality
         np.testing.assert_array_equal(np.around(TestLmp.SLIM_LMP_ARRAY, 4), np.around(slim_lmps, 4))
 
+    def test_zone_lookup_index(self):
+        """Test to make sure grid cells map to the position of their zone in the lookup table."""
+
+        # integer zones use a dense table offset by the minimum zone
+        zones_arr = np.array([[3, 5], [255, 3]], dtype=np.uint8)
+        zone_values, zone_index = LocationalMarginalPricing.zone_lookup_index(zones_arr)
+
+        np.testing.assert_array_equal(zones_arr, zone_values[zone_index])
+        self.assertEqual(253, zone_values.shape[0])
+
+        # zones spanning a large range are factorized
+        zones_arr = np.array([[3, -9999], [1000000, 3]], dtype=np.int32)
+        zone_values, zone_index = LocationalMarginalPricing.zone_lookup_index(zones_arr, max_table_size=100)
+
+        np.testing.assert_array_equal(zones_arr, zone_values[zone_index])
+        np.testing.assert_array_equal(np.array([-9999, 3, 1000000]), zone_values)
+
+    def test_cumulative_lmp(self):
+        """Test to make sure windowed means from the cumulative LMP match the mean of the sorted hours."""
+
+        lmp_values = np.random.default_rng(0).uniform(10, 500, size=(8760, 3))
+        lmp_values[10, 1] = np.nan
+
+        lmp_sums, lmp_counts = LocationalMarginalPricing.cumulative_lmp(lmp_values)
+
+        for capacity_factor_fraction in (0.2, 0.5, 0.85, 1.0):
+            start_index, through_index = LocationalMarginalPricing.get_cf_bin(capacity_factor_fraction)
+
+            # mean over the sorted hours as a data frame
+            lmp_df = pd.DataFrame(lmp_values)
+            expected = [lmp_df[j].sort_values(ascending=False).iloc[start_index:through_index].mean() for j in range(3)]
+
+            window_means = ((lmp_sums[through_index] - lmp_sums[start_index]) /
+                            (lmp_counts[through_index] - lmp_counts[start_index]))
+
+            np.testing.assert_allclose(expected, window_means, rtol=1e-12)
+
+    def test_read_lmp_file(self):
+        """Test to make sure converted LMP files read the same zones as the CSV they were converted from."""
+
+        lmp_df = pd.DataFrame({'hour': range(1, 25), '1': np.arange(24.0), '2': np.arange(24.0) * 2,
+                               '7': np.arange(24.0) * 7})
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            lmp_file = os.path.join(tmp_dir, 'lmp.csv')
+            lmp_df.to_csv(lmp_file, index=False)
+
+            expected = lmp_df[['1', '7']]
+            pd.testing.assert_frame_equal(expected, read_lmp_file(lmp_file, zones=[1, 7, 9]))
+
+            for extension in ('parquet', 'feather', 'npz'):
+                output_file = convert_lmp_file(lmp_file, os.path.join(tmp_dir, f'lmp.{extension}'))
+                pd.testing.assert_frame_equal(expected, read_lmp_file(output_file, zones=[1, 7, 9]))
+
 
 if __name__ == '__main__':
     unittest.main()
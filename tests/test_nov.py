@@ -11,7 +11,7 @@ import unittest
 
 import numpy as np
 
-from cerf.nov import NetOperationalValue
+from cerf.nov import NetOperationalValue, calc_nov_batch
 
 
 class TestNov(unittest.TestCase):
@@ -148,6 +148,32 @@ class TestNov(unittest.TestCase):
         # test NOV
         np.testing.assert_almost_equal(nov_tech_arr, TestNov.EXPECTED_NOV_WITHCARBON_NOLEAP, decimal=4)
 
+    def test_nov_batch(self):
+        """Test batched NOV matches NOV calculated per technology."""
+
+        econ = self.instantiate_nov(target_year=2010,  # four digit year
+                                    carbon_tax_usd_per_ton=10.0,  # $/ton
+                                    fuel_co2_content_tons_per_btu=1.2,  # tons/MWh gets converted to tons/Btu
+                                    carbon_capture_rate_fraction=0.05,  # fraction
+                                    consider_leap_year=False
+                                    )
+        genenration, operating_cost, nov_tech_arr = econ.calc_nov()
+
+        # two technologies sharing parameters and a third without any
+        lmp_arr = np.full((3, 2, 2), TestNov.LMP_ARR[0])
+
+        generation_arr, operating_cost_arr, nov_arr = calc_nov_batch(lmp_arr,
+                                                                     generation=[genenration] * 2,
+                                                                     operating_cost=[operating_cost] * 2,
+                                                                     lf_fuel=[econ.lf_fuel] * 2)
+
+        np.testing.assert_array_equal(np.full((2, 2, 2), nov_tech_arr[0]), nov_arr[:2])
+        np.testing.assert_array_equal(np.full((2, 2, 2), genenration), generation_arr[:2])
+        np.testing.assert_array_equal(np.full((2, 2, 2), operating_cost), operating_cost_arr[:2])
+
+        # technologies without parameters are zero
+        self.assertEqual(0, np.count_nonzero(nov_arr[2]))
+
 
 if __name__ == '__main__':
     unittest.main()
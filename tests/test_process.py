@@ -0,0 +1,168 @@
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from cerf.model import Model
+from cerf.process import (cerf_parallel, load_region_timings, run_pathway, save_region_timings, schedule_regions,
+                          validate_precision)
+from cerf.stage import Stage
+from tests.synthetic import create_config
+
+
+class TestProcess(unittest.TestCase):
+
+    @staticmethod
+    def create_proxy_run():
+        """Create a proxy model and staged data having three regions of different sizes and one empty region."""
+
+        model = SimpleNamespace(technology_order=[1, 2],
+                                regions_dict={'small': 1, 'empty': 2, 'large': 3, 'medium': 4},
+                                expansion_dict={'small': {1: {'n_sites': 1}, 2: {'n_sites': 0}},
+                                                'empty': {1: {'n_sites': 0}, 2: {'n_sites': 0}},
+                                                'large': {1: {'n_sites': 2}, 2: {'n_sites': 3}},
+                                                'medium': {1: {'n_sites': 4}, 2: {'n_sites': 0}}})
+
+        data = SimpleNamespace(region_index={1: {'bounds': (0, 2, 0, 5)},
+                                             2: {'bounds': (0, 10, 0, 10)},
+                                             3: {'bounds': (0, 10, 0, 10)},
+                                             4: {'bounds': (0, 5, 0, 5)}})
+
+        return model, data
+
+    def test_schedule_regions(self):
+        """Ensure regions are ordered largest first and regions without sites are not dispatched."""
+
+        model, data = self.create_proxy_run()
+
+        schedule = schedule_regions(model, data)
+
+        self.assertEqual({'large': 1000, 'medium': 200, 'small': 20}, schedule)
+        self.assertEqual(['large', 'medium', 'small'], list(schedule.keys()))
+
+        # recorded timings showing the small region is slow move it ahead; the medium region has no timing and is
+        #   expected to take 200 * 60 / 1020 seconds from the average time per unit of estimated cost
+        timings = {'small': {'estimate': 20, 'seconds': 50.0}, 'large': {'estimate': 1000, 'seconds': 10.0}}
+
+        schedule = schedule_regions(model, data, timings)
+
+        self.assertEqual(['small', 'medium', 'large'], list(schedule.keys()))
+
+    def test_region_timings(self):
+        """Ensure timings are written and merged with the timings of earlier runs."""
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            timing_file = os.path.join(tmp_dir, 'timings.json')
+
+            self.assertEqual({}, load_region_timings(timing_file))
+
+            save_region_timings(timing_file, {'a': {'estimate': 10, 'seconds': 1.5}})
+            save_region_timings(timing_file, {'b': {'estimate': 20, 'seconds': 2.5}})
+
+            self.assertEqual({'a': {'estimate': 10, 'seconds': 1.5}, 'b': {'estimate': 20, 'seconds': 2.5}},
+                             load_region_timings(timing_file))
+
+    def test_share_arrays(self):
+        """Ensure shared arrays are read-only memory maps of the staged arrays and that process based workers
+        attaching to them site the same plants as a sequential run."""
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+
+            model = Model(config_dict=create_config(tmp_dir))
+
+            data = model.stage()
+            expected_df = cerf_parallel(model, data, write_output=False, method='sequential')
+
+            staged = {i: np.array(getattr(data, i)) for i in data.SHARED_ARRAYS}
+
+            data.share_arrays(os.path.join(tmp_dir, 'shared'))
+
+            for name, arr in staged.items():
+                shared_arr = getattr(data, name)
+
+                self.assertIsInstance(shared_arr, np.memmap)
+                self.assertFalse(shared_arr.flags.writeable)
+                self.assertEqual(arr.dtype, shared_arr.dtype)
+                np.testing.assert_array_equal(arr, shared_arr)
+
+            # the expansion plan is consumed while siting so a new model is used against the shared arrays
+            model = Model(config_dict=create_config(tmp_dir))
+            sited_df = cerf_parallel(model, data, write_output=False, n_jobs=2, method='loky')
+
+            model.close_logger()
+
+        self.assertGreater(len(expected_df), 0)
+        pd.testing.assert_frame_equal(expected_df.reset_index(drop=True), sited_df.reset_index(drop=True))
+
+    def test_run_pathway(self):
+        """Ensure year independent products are staged once across a pathway, year dependent products are not held
+        in memory, and the sites of each year initialize the next."""
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+
+            configs_by_year = {2040: create_config(tmp_dir, run_year=2040),
+                               2030: create_config(tmp_dir, run_year=2030)}
+
+            with mock.patch.object(Stage, 'calculate_ic', autospec=True, side_effect=Stage.calculate_ic) as ic, \
+                    mock.patch.object(Stage, 'calculate_nov', autospec=True, side_effect=Stage.calculate_nov) as nov, \
+                    mock.patch.object(Model, 'stage', autospec=True, side_effect=Model.stage) as stage:
+
+                results = run_pathway(configs_by_year, write_output=False)
+
+        self.assertEqual([2030, 2040], list(results.keys()))
+
+        # interconnection costs are reused while NOV depends on the run year
+        self.assertEqual(1, ic.call_count)
+        self.assertEqual(2, nov.call_count)
+
+        # the region index, LMP zones, LMP, interconnection costs, and base suitability of the last year are held
+        memory_cache = stage.call_args.kwargs['memory_cache']
+        self.assertEqual(5, len(memory_cache))
+
+        # all sites of the first year are active and initialize the second year where new sites avoid them
+        first_df = results[2030].reset_index(drop=True)
+        second_df = results[2040].reset_index(drop=True)
+
+        self.assertGreater(len(first_df), 0)
+        pd.testing.assert_frame_equal(first_df, second_df.iloc[:len(first_df)])
+
+        new_df = second_df.iloc[len(first_df):]
+        self.assertGreater(len(new_df), 0)
+        self.assertTrue((new_df['sited_year'] == 2040).all())
+        self.assertFalse(new_df['index'].isin(first_df['index']).any())
+
+    def test_validate_precision(self):
+        """Ensure float32 staging sites the same plants as float64 with NLC differing only by rounding and that only
+        plants sited in the run year are counted."""
+
+        # initialized plants of an earlier year where three share the same grid cell
+        initialize_site_data = pd.DataFrame({'xcoord': [2500.0, 2500.0, 2500.0, 12500.0],
+                                             'ycoord': [11500.0, 11500.0, 11500.0, 5500.0],
+                                             'retirement_year': [2050, 2050, 2050, 2050],
+                                             'buffer_in_km': [1, 1, 1, 1],
+                                             'tech_id': [1, 1, 1, 2],
+                                             'sited_year': [2020, 2020, 2020, 2020]})
+
+        for site_data in (None, initialize_site_data):
+
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                summary_df = validate_precision(config_dict=create_config(tmp_dir),
+                                                precision='float32',
+                                                initialize_site_data=site_data)
+
+            self.assertEqual([1, 2], summary_df['tech_id'].tolist())
+            self.assertEqual([7, 8], summary_df['n_sites_float64'].tolist())
+            np.testing.assert_array_equal(summary_df['n_sites_float64'], summary_df['n_sites_float32'])
+            np.testing.assert_array_equal(summary_df['n_sites_float64'], summary_df['n_sites_matched'])
+            np.testing.assert_array_equal(np.ones(2), summary_df['fraction_matched'])
+
+            # NLC of the synthetic sites is on the order of 1e7 $/yr
+            self.assertTrue((summary_df['max_abs_nlc_difference'] < 100).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import copy
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+import rasterio
+
+from cerf.model import Model
+from cerf.process_region import ProcessRegion
+from tests.synthetic import create_config
+
+
+class TestProcessRegion(unittest.TestCase):
+    """Tests for extracting the suitability and NLC of a region."""
+
+    INITIALIZE_SITE_DATA = pd.DataFrame({'xcoord': [7500.0, 15500.0],
+                                         'ycoord': [14500.0, 5500.0],
+                                         'retirement_year': [2050, 2050],
+                                         'buffer_in_km': [2, 1]})
+
+    @staticmethod
+    def previous_region_arrays(suitability_files, init_arr, region_extent, nlc_arr):
+        """Build the region suitability and NLC of a region as floating point and masked arrays.  Suitability rasters
+        are loaded as floats, existing sites are added as their maximum, and cells outside of the region are added
+        before anything non-zero is made unsuitable.
+
+        """
+
+        suitability_arr = []
+        for suitability_file in suitability_files:
+            with rasterio.open(suitability_file) as src:
+                suitability_arr.append(src.read(1).astype(np.float64))
+
+        suitability_arr = np.array(suitability_arr)
+        suitability_arr = np.maximum(suitability_arr, init_arr.astype(np.float64))
+
+        ymin, ymax, xmin, xmax = region_extent['bounds']
+
+        suitability_region = suitability_arr[:, ymin:ymax, xmin:xmax] + (~region_extent['mask']).astype(np.float64)
+        suitability_region = np.where(suitability_region == 0, 0, 1)
+        suitability_region = np.insert(suitability_region, 0, np.ones_like(suitability_region[0]), axis=0)
+
+        nlc_region = nlc_arr[:, ymin:ymax, xmin:xmax].copy()
+        nlc_region = np.insert(nlc_region, 0, np.zeros_like(nlc_region[0]), axis=0)
+        nlc_region = np.nan_to_num(nlc_region, nan=np.nanmax(nlc_region) + 1)
+
+        return suitability_region, np.ma.masked_array(nlc_region, mask=suitability_region)
+
+    def test_region_suitability(self):
+        """Ensure the boolean region suitability and +inf masked NLC match the floating point and masked array
+        extraction they replace, including existing site buffers and cells of NaN NLC."""
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+
+            model = Model(config_dict=create_config(tmp_dir), initialize_site_data=self.INITIALIZE_SITE_DATA)
+            data = model.stage()
+
+            suitability_files = data.suitability_raster_files()
+
+            # a suitable grid cell in each region without a valid NLC
+            nlc_arr = data.nlc_arr.copy()
+            nlc_arr[1, 2, 5] = np.nan
+            nlc_arr[0, 16, 22] = np.nan
+
+            for target_region_name, target_region_id in model.regions_dict.items():
+
+                region_extent = data.region_index[target_region_id]
+
+                process = ProcessRegion(settings_dict=model.settings_dict,
+                                        technology_dict=model.technology_dict,
+                                        technology_order=model.technology_order,
+                                        expansion_dict=copy.deepcopy(model.expansion_dict),
+                                        regions_dict=model.regions_dict,
+                                        suitability_arr=data.suitability_arr,
+                                        lmp_arr=data.lmp_arr,
+                                        generation_arr=data.generation_arr,
+                                        operating_cost_arr=data.operating_cost_arr,
+                                        nov_arr=data.nov_arr,
+                                        ic_arr=data.ic_arr,
+                                        nlc_arr=nlc_arr,
+                                        zones_arr=data.zones_arr,
+                                        coordinates=data.coordinates,
+                                        grid_index=data.grid_index,
+                                        target_region_name=target_region_name,
+                                        randomize=False,
+                                        region_extent=region_extent)
+
+                expected_suitability, expected_nlc = self.previous_region_arrays(suitability_files,
+                                                                                 data.init_arr,
+                                                                                 region_extent,
+                                                                                 nlc_arr)
+
+                np.testing.assert_array_equal(expected_suitability, process.suitability_array_region)
+
+                # existing sites and their buffers are unsuitable for every technology
+                self.assertTrue(process.suitability_array_region[:, data.init_arr[process.ymin:process.ymax,
+                                                                                  process.xmin:process.xmax] != 0].all())
+
+                # masked cells are +inf and all others keep their value
+                nlc_region = process.suitable_nlc_region
+                np.testing.assert_array_equal(expected_nlc.mask, np.isinf(nlc_region))
+                np.testing.assert_array_equal(expected_nlc.data[~expected_nlc.mask], nlc_region[~expected_nlc.mask])
+
+            model.close_logger()
+
+
+if __name__ == '__main__':
+    unittest.main()
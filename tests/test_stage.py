@@ -0,0 +1,123 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from cerf.model import Model
+from tests.synthetic import REGIONS, create_config, write_substations
+
+
+class TestStage(unittest.TestCase):
+    """Tests for staging data on a synthetic grid."""
+
+    def test_region_index(self):
+        """Ensure only the configured regions are indexed and grid cells of nodata are not a region."""
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+
+            model = Model(config_dict=create_config(tmp_dir))
+            data = model.stage()
+
+            model.close_logger()
+
+        self.assertEqual(sorted(REGIONS.values()), sorted(data.region_index.keys()))
+
+    def test_ic_cache_attributes(self):
+        """Ensure editing the attributes of the substations invalidates the cached interconnection costs."""
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+
+            settings = {'staging_cache_directory': os.path.join(tmp_dir, 'cache')}
+
+            model = Model(config_dict=create_config(tmp_dir, settings=settings))
+            ic_arr = model.stage().ic_arr
+
+            # swap the voltages of the substations; only the attribute table of the shapefile changes
+            write_substations(os.path.join(tmp_dir, 'substations.shp'), [300, 100])
+
+            model = Model(config_dict=create_config(tmp_dir, settings=settings))
+            cached_ic_arr = model.stage().ic_arr
+
+            model = Model(config_dict=create_config(tmp_dir))
+            expected_ic_arr = model.stage().ic_arr
+
+            model.close_logger()
+
+        self.assertFalse(np.array_equal(ic_arr, expected_ic_arr))
+        np.testing.assert_array_equal(expected_ic_arr, cached_ic_arr)
+
+    def test_precision(self):
+        """Ensure all staged cubes are float32 when requested, including prebuilt interconnection costs."""
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+
+            model = Model(config_dict=create_config(tmp_dir))
+            ic_arr = model.stage().ic_arr
+
+            interconnection_cost_file = os.path.join(tmp_dir, 'ic.npy')
+            np.save(interconnection_cost_file, ic_arr)
+
+            for target_region_name in (None, 'south'):
+
+                config = create_config(tmp_dir, settings={'precision': 'float32'})
+                config['infrastructure']['interconnection_cost_file'] = interconnection_cost_file
+
+                model = Model(config_dict=config)
+                data = model.stage(target_region_name=target_region_name)
+
+                for name in ('lmp_arr', 'generation_arr', 'operating_cost_arr', 'nov_arr', 'ic_arr', 'nlc_arr'):
+                    self.assertEqual(np.float32, getattr(data, name).dtype, name)
+
+            model.close_logger()
+
+    def test_window(self):
+        """Ensure data staged for the bounding box of a region equals the same slice of data staged for the full grid
+        space and that single region runs site the same plants either way."""
+
+        initialize_site_data = pd.DataFrame({'xcoord': [2500.0, 12500.0],
+                                             'ycoord': [11500.0, 5500.0],
+                                             'retirement_year': [2050, 2050],
+                                             'buffer_in_km': [2, 1]})
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+
+            model = Model(config_dict=create_config(tmp_dir), initialize_site_data=initialize_site_data)
+            full_data = model.stage()
+
+            for target_region_name, target_region_id in REGIONS.items():
+
+                data = model.stage(target_region_name=target_region_name)
+
+                ymin, ymax, xmin, xmax = full_data.region_index[target_region_id]['bounds']
+                self.assertEqual((ymin, ymax, xmin, xmax), data.window)
+
+                for name in data.SHARED_ARRAYS:
+                    np.testing.assert_array_equal(getattr(full_data, name)[..., ymin:ymax, xmin:xmax],
+                                                  getattr(data, name),
+                                                  err_msg=name)
+
+                np.testing.assert_array_equal(full_data.init_arr[ymin:ymax, xmin:xmax], data.init_arr)
+                np.testing.assert_array_equal(full_data.region_index[target_region_id]['mask'],
+                                              data.region_index[target_region_id]['mask'])
+
+                # single region runs stage the bounding box of the region by default
+                sited_dfs = []
+                for settings, staged_region_name in (({}, target_region_name), ({'lazy_staging': False}, None)):
+                    region_model = Model(config_dict=create_config(tmp_dir, settings=settings),
+                                         initialize_site_data=initialize_site_data)
+
+                    with mock.patch.object(Model, 'stage', autospec=True, side_effect=Model.stage) as stage:
+                        process = region_model.run_single_region(target_region_name, write_output=False)
+
+                    self.assertEqual(staged_region_name, stage.call_args.kwargs.get('target_region_name'))
+                    sited_dfs.append(process.run_data.sited_df.reset_index(drop=True))
+
+                self.assertGreater(len(sited_dfs[0]), 0)
+                pd.testing.assert_frame_equal(sited_dfs[1], sited_dfs[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
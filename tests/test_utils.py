@@ -7,9 +7,14 @@ License:  BSD 2-Clause, see LICENSE and DISCLAIMER files
 
 """
 
+import os
+import tempfile
 import unittest
 
 import numpy as np
+import pandas as pd
+import rasterio
+from rasterio.transform import from_origin
 
 import cerf.utils as util
 
@@ -75,6 +80,151 @@ class TestUtils(unittest.TestCase):
         # compare buffer indices
         self.assertEqual(TestUtils.COMP_BUFF_FLAT_19_LIST, buff_19)
 
+    def test_buffer_flat_indices(self):
+        """Test to make sure the buffer indices are clipped to the grid space and returned as an array."""
+
+        # buffer top left corner by two cells
+        buff_0 = util.buffer_flat_indices(target_index=0, nrows=4, ncols=5, ncells=2)
+
+        np.testing.assert_array_equal(np.array(TestUtils.COMP_BUFF_FLAT_0_LIST), buff_0)
+
+        # buffer bottom right corner by two cells
+        buff_19 = util.buffer_flat_indices(target_index=19, nrows=4, ncols=5, ncells=2)
+
+        np.testing.assert_array_equal(np.array(TestUtils.COMP_BUFF_FLAT_19_LIST), buff_19)
+
+        # an index outside of the grid space is not allowed
+        with self.assertRaises(IndexError):
+            util.buffer_flat_indices(target_index=20, nrows=4, ncols=5, ncells=2)
+
+    def test_buffer_stencil(self):
+        """Test to make sure buffer stencils respect the cell size and shape and are cached."""
+
+        # a 2 km buffer on 1 km grid cells is a 5 x 5 window
+        row_offsets, col_offsets = util.buffer_stencil(2)
+        self.assertEqual(25, row_offsets.shape[0])
+
+        # the same stencil is reused for equivalent buffers
+        self.assertIs(util.buffer_stencil(2), util.buffer_stencil(2.0))
+
+        # a 2 km buffer on 500 m grid cells is a 9 x 9 window
+        row_offsets, col_offsets = util.buffer_stencil(2, cell_size=(500.0, -500.0))
+        self.assertEqual(81, row_offsets.shape[0])
+
+        # a circular 2 km buffer on 1 km grid cells excludes the corners of the window
+        row_offsets, col_offsets = util.buffer_stencil(2, shape='circle')
+        self.assertEqual(13, row_offsets.shape[0])
+        self.assertTrue(np.all(row_offsets ** 2 + col_offsets ** 2 <= 4))
+
+        # apply the stencil to the top left corner of a 4 x 5 grid
+        buff_0 = util.stencil_flat_indices(0, 4, 5, util.buffer_stencil(2, shape='circle'))
+        np.testing.assert_array_equal(np.array([0, 1, 2, 5, 6, 10]), buff_0)
+
+    def test_build_region_index(self):
+        """Test to make sure the region index matches the bounds and footprint of each region."""
+
+        regions_arr = np.array([[1, 1, 0, 2, 2],
+                                [1, 3, 0, 2, 0],
+                                [0, 3, 3, 0, 0],
+                                [0, 0, 0, 0, 255]], dtype=np.uint8)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            region_raster_file = os.path.join(tmp_dir, 'regions.tif')
+
+            with rasterio.open(region_raster_file, 'w', driver='GTiff', height=4, width=5, count=1,
+                               dtype=regions_arr.dtype, nodata=255) as dest:
+                dest.write(regions_arr, 1)
+
+            region_index = util.build_region_index(region_raster_file, [1, 2, 3])
+
+            # the nodata value is never indexed as a region
+            self.assertEqual([1, 2, 3], sorted(util.build_region_index(region_raster_file).keys()))
+
+        self.assertEqual([1, 2, 3], sorted(region_index.keys()))
+
+        for region_id, extent in region_index.items():
+            ymin, ymax, xmin, xmax = extent['bounds']
+            region_rows, region_cols = np.where(regions_arr == region_id)
+
+            self.assertEqual((region_rows.min(), region_rows.max() + 1), (ymin, ymax))
+            self.assertEqual((region_cols.min(), region_cols.max() + 1), (xmin, xmax))
+            np.testing.assert_array_equal(regions_arr[ymin:ymax, xmin:xmax] == region_id, extent['mask'])
+
+    def test_read_raster_window(self):
+        """Test to make sure windowed reads and coordinates match the bounding box of the full raster."""
+
+        arr = np.arange(20, dtype=np.int32).reshape(4, 5)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            raster_file = os.path.join(tmp_dir, 'grid.tif')
+
+            with rasterio.open(raster_file, 'w', driver='GTiff', height=4, width=5, count=1, dtype=arr.dtype,
+                               transform=from_origin(0, 4000, 1000, 1000)) as dest:
+                dest.write(arr, 1)
+
+            np.testing.assert_array_equal(arr, util.read_raster(raster_file))
+            np.testing.assert_array_equal(arr[1:3, 2:5], util.read_raster(raster_file, bounds=(1, 3, 2, 5)))
+
+            xcoords, ycoords = util.raster_to_coord_arrays(raster_file)
+            xcoords_window, ycoords_window = util.raster_to_coord_arrays(raster_file, bounds=(1, 3, 2, 5))
+
+        np.testing.assert_array_equal(xcoords[1:3, 2:5], xcoords_window)
+        np.testing.assert_array_equal(ycoords[1:3, 2:5], ycoords_window)
+
+    def test_ingest_sited_data(self):
+        """Test to make sure sites are located by coordinate and their buffers are applied per site."""
+
+        siting_df = pd.DataFrame({'xcoord': [500.0, 3500.0, 3600.0, 4500.0],
+                                  'ycoord': [3500.0, 1500.0, 1400.0, 500.0],
+                                  'retirement_year': [2050, 2050, 2050, 2020],
+                                  'buffer_in_km': [1, 0, 1, 1]})
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            raster_file = os.path.join(tmp_dir, 'grid.tif')
+
+            with rasterio.open(raster_file, 'w', driver='GTiff', height=4, width=5, count=1, dtype=np.uint8,
+                               transform=from_origin(0, 4000, 1000, 1000)) as dest:
+                dest.write(np.zeros((4, 5), dtype=np.uint8), 1)
+
+            sited_arr, active_df = util.ingest_sited_data(run_year=2030,
+                                                          x_array=None,
+                                                          siting_data=siting_df,
+                                                          template_raster_file=raster_file,
+                                                          max_scatter_size=4)
+
+        # the retired site is dropped and the buffer of the first site listed in a grid cell applies
+        expected = np.array([[1, 1, 0, 0, 0],
+                             [1, 1, 0, 0, 0],
+                             [0, 0, 0, 1, 0],
+                             [0, 0, 0, 0, 0]], dtype=np.int8)
+
+        np.testing.assert_array_equal(expected, sited_arr)
+        np.testing.assert_array_equal(np.array([0, 13, 13], dtype=np.uint32), active_df['index'].values)
+
+    def test_exclusion_builder(self):
+        """Test to make sure dilating sites by their buffers matches scattering each buffer around each site."""
+
+        rng = np.random.default_rng(0)
+        shape = (40, 50)
+        index = rng.integers(0, shape[0] * shape[1], 200)
+        buffer_in_km = rng.choice([0, 2, 3.5], 200)
+
+        for buffer_shape in ('square', 'circle'):
+
+            builder = util.ExclusionBuilder(shape, buffer_shape=buffer_shape)
+            builder.add(index, buffer_in_km)
+
+            scattered = np.zeros(shape[0] * shape[1], dtype=bool)
+            dilated = np.zeros(shape, dtype=bool)
+
+            for site_buffer_km, index_list in builder.groups.items():
+                stencil = util.buffer_stencil(site_buffer_km, shape=buffer_shape)
+                builder.scatter(scattered, np.concatenate(index_list), stencil)
+                dilated |= builder.dilate(np.concatenate(index_list), stencil)
+
+            np.testing.assert_array_equal(scattered.reshape(shape), dilated)
+            np.testing.assert_array_equal(dilated, builder.build())
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file